@@ -0,0 +1,118 @@
+"""
+Benchmark : latence d'un endpoint sans rapport (/api/settings) pendant des uploads de photos
+Usage : python bench_image_pool.py --url http://localhost:8001 --uploads 16 --duration 20
+"""
+import argparse
+import base64
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+from PIL import Image
+
+def make_photo(width: int, height: int) -> str:
+    """Photo de téléphone simulée : bruit gaussien (pas compressible trivialement)"""
+    img = Image.effect_noise((width, height), 64).convert('RGB')
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=95)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def probe(url: str, stop: threading.Event) -> list:
+    """Interroge /api/settings en boucle et retourne les latences en ms"""
+    latencies = []
+    session = requests.Session()
+    while not stop.is_set():
+        start = time.perf_counter()
+        session.get(f'{url}/api/settings', timeout=30)
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.01)
+    return latencies
+
+def report(label: str, latencies: list):
+    print(
+        f"{label:<20} n={len(latencies):<5} "
+        f"p50={percentile(latencies, 50):7.1f}ms  "
+        f"p99={percentile(latencies, 99):7.1f}ms  "
+        f"max={max(latencies, default=float('nan')):7.1f}ms  "
+        f"mean={statistics.fmean(latencies) if latencies else float('nan'):7.1f}ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://localhost:8001')
+    parser.add_argument('--username', default='AdminLudo')
+    parser.add_argument('--password', default='AdminLudo')
+    parser.add_argument('--uploads', type=int, default=16, help='uploads simultanés')
+    parser.add_argument('--duration', type=float, default=20, help='durée de la phase de charge (s)')
+    parser.add_argument('--size', default='4000x3000', help='taille des photos envoyées')
+    args = parser.parse_args()
+
+    token = requests.post(
+        f'{args.url}/api/auth/login',
+        json={'username': args.username, 'password': args.password},
+        timeout=30
+    ).json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+    width, height = (int(v) for v in args.size.split('x'))
+    photo = make_photo(width, height)
+    print(f"Photo de test : {args.size}, {len(photo) / 1024:.0f} KB en base64")
+
+    # Phase 1 : référence sans charge
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(probe, args.url, stop)
+        time.sleep(min(5, args.duration))
+        stop.set()
+        baseline = future.result()
+
+    # Phase 2 : uploads en continu pendant la mesure
+    stop = threading.Event()
+    created, rejected, upload_times = [], [], []
+
+    def upload_loop():
+        session = requests.Session()
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = session.post(
+                f'{args.url}/api/articles',
+                json={'type': 'piece', 'nom': 'bench_image_pool', 'ref': 'BENCH', 'photos': [photo]},
+                headers=headers,
+                timeout=120
+            )
+            upload_times.append((time.perf_counter() - start) * 1000)
+            if response.status_code == 503:
+                rejected.append(response)
+            elif response.ok:
+                created.append(response.json()['id'])
+
+    with ThreadPoolExecutor(max_workers=args.uploads + 1) as executor:
+        future = executor.submit(probe, args.url, stop)
+        uploaders = [executor.submit(upload_loop) for _ in range(args.uploads)]
+        time.sleep(args.duration)
+        stop.set()
+        loaded = future.result()
+        for uploader in uploaders:
+            uploader.result()
+
+    print()
+    report('sans upload', baseline)
+    report('pendant uploads', loaded)
+    report('uploads', upload_times)
+    print(f"uploads réussis={len(created)}  rejetés (503)={len(rejected)}")
+
+    # Nettoyage des articles de test
+    for article_id in created:
+        requests.delete(f'{args.url}/api/articles/{article_id}', headers=headers, timeout=30)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Image processing helpers (PIL only, no app state)
+Kept out of server.py so the image process pool workers can import them cheaply
+"""
+from io import BytesIO
+from typing import Dict, Optional
+import base64
+
+from PIL import Image, ImageOps
+
+def decode_data_url(data_url: str) -> Optional[bytes]:
+    """Return the raw bytes of a base64 image data URL, or None if it isn't one"""
+    if not data_url or not isinstance(data_url, str) or not data_url.startswith('data:image'):
+        return None
+    if ',' not in data_url:
+        return None
+    data = data_url.split(',', 1)[1]
+    if not data:
+        return None
+    try:
+        return base64.b64decode(data) or None
+    except Exception as e:
+        print(f"Error decoding base64: {e}")
+        return None
+
+# Precomputed photo sizes (longest side in px), served by /api/photos/{id}?size=
+PHOTO_SIZES = {'full': 750, 'card': 320, 'thumb': 96}
+
+def open_image(img_data: bytes) -> Optional[Image.Image]:
+    """Open raw image bytes lazily (only the header is parsed), None if the image can't be read"""
+    try:
+        return Image.open(BytesIO(img_data))
+    except Exception as e:
+        print(f"Error opening image: {e}")
+        return None
+
+# Header blocks encode_jpeg never writes (Pillow exposes them in img.info)
+JPEG_METADATA_KEYS = ('exif', 'xmp', 'icc_profile', 'photoshop', 'comment')
+
+def is_optimized_jpeg(img: Image.Image, max_side: int) -> bool:
+    """True for a baseline RGB JPEG already within max_side and without metadata, i.e. what encode_jpeg produces
+    
+    Only looks at the header: no pixel data is decoded. Any EXIF or XMP (APP1) block rules
+    the fast path out, not just an orientation tag: it may carry the GPS position or camera
+    details, which must not be served with the photo. Same for ICC profiles and comments.
+    """
+    if img.format != 'JPEG' or img.mode != 'RGB' or max(img.size) > max_side:
+        return False
+    if 'progressive' in img.info or 'progression' in img.info:
+        return False
+    return not any(key in img.info for key in JPEG_METADATA_KEYS)
+
+def load_normalized_image(img: Image.Image, max_side: int) -> Image.Image:
+    """Decode an opened image as an upright RGB image of at least max_side (when it was bigger)"""
+    # JPEG draft mode: let the decoder downscale by 1/2, 1/4 or 1/8 while decoding,
+    # a 4000px phone photo is never fully decoded to end up at 750px
+    if img.format == 'JPEG':
+        try:
+            img.draft('RGB', (max_side, max_side))
+        except Exception:
+            pass
+    
+    # Fix EXIF orientation (rotates image based on EXIF data)
+    # This will automatically rotate the image to the correct orientation
+    try:
+        img = ImageOps.exif_transpose(img)
+    except Exception as exif_err:
+        # If exif_transpose fails, try to get orientation from EXIF manually
+        try:
+            exif = img.getexif()
+            if exif is not None:
+                orientation = exif.get(274)  # Orientation tag
+                if orientation == 3:
+                    img = img.rotate(180, expand=True)
+                elif orientation == 6:
+                    img = img.rotate(270, expand=True)
+                elif orientation == 8:
+                    img = img.rotate(90, expand=True)
+        except Exception:
+            pass  # If all fails, use image as-is
+    
+    # Convert RGBA to RGB if necessary
+    if img.mode == 'RGBA':
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])  # Use alpha channel as mask
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    return img
+
+def encode_jpeg(img: Image.Image, quality: int = 75) -> bytes:
+    # Compress and save without EXIF to avoid orientation issues
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+def compress_image_bytes(img_data: bytes, max_size: tuple = (750, 750), quality: int = 75) -> Optional[bytes]:
+    """Compress raw image bytes to JPEG and fix EXIF orientation, None if the image can't be read
+    
+    Already optimized JPEGs are returned unchanged (same bytes object).
+    """
+    try:
+        img = open_image(img_data)
+        if img is None:
+            return None
+        if is_optimized_jpeg(img, max(max_size)):
+            return img_data
+        
+        img = load_normalized_image(img, max(max_size))
+        # Resize if needed
+        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+        return encode_jpeg(img, quality)
+    except Exception as e:
+        print(f"Error compressing image: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def make_derivatives(img_data: bytes, quality: int = 75) -> Optional[Dict[str, bytes]]:
+    """Decode once and encode every PHOTO_SIZES variant, None if the image can't be read
+    
+    An already optimized JPEG is kept as the full size without re-encoding.
+    """
+    try:
+        img = open_image(img_data)
+        if img is None:
+            return None
+        
+        variants = {}
+        largest = max(PHOTO_SIZES.values())
+        if is_optimized_jpeg(img, largest):
+            variants['full'] = img_data
+        img = load_normalized_image(img, largest)
+        
+        # Largest first: each size is reduced from the previous one
+        for name, size in sorted(PHOTO_SIZES.items(), key=lambda item: item[1], reverse=True):
+            if name in variants:
+                continue
+            img.thumbnail((size, size), Image.Resampling.LANCZOS)
+            variants[name] = encode_jpeg(img, quality)
+        return variants
+    except Exception as e:
+        print(f"Error generating image sizes: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def compress_image(base64_str: str, max_size: tuple = (750, 750), quality: int = 75) -> str:
+    """Compress base64 image and fix EXIF orientation"""
+    # Not a data URL: might already be processed or invalid, return as-is
+    img_data = decode_data_url(base64_str)
+    if not img_data:
+        return base64_str
+    
+    compressed_data = compress_image_bytes(img_data, max_size, quality)
+    if compressed_data is None or compressed_data is img_data:
+        # Unreadable, or already optimized: no need to re-encode the base64 either
+        return base64_str
+    
+    return f"data:image/jpeg;base64,{base64.b64encode(compressed_data).decode()}"
@@ -0,0 +1,39 @@
+"""
+Commandes de migration de la base de données
+Usage : python migrate.py <commande>
+"""
+import argparse
+import asyncio
+
+import server
+
+# commande -> (coroutine de migration, description)
+COMMANDS = {
+    'article-fields': (server.backfill_article_fields, 'Recalculer les champs matérialisés des articles (photo_count, has_photo...)'),
+    'photos': (server.run_fix_images_job, 'Déplacer les photos base64 des articles vers le photo store (reprend le job fix-images)'),
+    'photo-sizes': (server.backfill_photo_sizes, 'Générer les tailles card/thumb des photos existantes'),
+    'photo-refs': (server.rebuild_photo_refs, 'Recompter les références des photos et supprimer les inutilisées'),
+    'vocabulary': (server.rebuild_vocabulary, 'Recompter les catégories / sous-catégories utilisées par les articles'),
+    'brands': (server.rebuild_brands, 'Recompter les marques (index de la recherche par préfixe)'),
+}
+
+async def run(command: str):
+    migration, _ = COMMANDS[command]
+    try:
+        result = await migration()
+        print(f"✅ {command} : {result}")
+    finally:
+        server.client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrations BMS Inventory')
+    parser.add_argument(
+        'command',
+        choices=sorted(COMMANDS),
+        help=' | '.join(f'{name}: {description}' for name, (_, description) in sorted(COMMANDS.items()))
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.command))
+
+if __name__ == "__main__":
+    main()
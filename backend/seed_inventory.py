@@ -4,6 +4,8 @@ INVENTAIRE COMPLET DE GARAGE AUTOMOBILE avec vraies références, vraies photos
 """
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
 from dotenv import load_dotenv
 from pathlib import Path
@@ -11,6 +13,9 @@ import random
 import string
 from datetime import datetime, timezone, timedelta
 
+# Champs matérialisés calculés comme le serveur (catalogue_visible, ref_key, sous_categorie_keys...)
+from server import article_derived_fields
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -1018,21 +1023,47 @@ LIQUIDES_DATA = [
     },
 ]
 
+async def insert_article(article_data):
+    """Insère l'article, avec un nouveau SKU si jamais il est déjà pris (index unique sur sku)"""
+    while True:
+        article_data.update(article_derived_fields(article_data))
+        try:
+            await db.articles.insert_one(article_data)
+            return
+        except DuplicateKeyError as e:
+            if 'sku' not in ((e.details or {}).get('keyPattern') or {}):
+                raise
+            article_data.pop('_id', None)
+            article_data['sku'] = generate_sku()
+
 async def seed_database():
     print("🚀 Démarrage du peuplement ULTRA RÉALISTE de la base de données...")
     print("📦 Inventaire complet de garage automobile\n")
     
+    # Le compteur des ids (collection counters, partagé avec le serveur) passe après les articles existants
+    last_article = await db.articles.find_one({}, {'_id': 0, 'id': 1}, sort=[('id', -1)])
+    if last_article:
+        await db.counters.update_one({'_id': 'articles'}, {'$max': {'seq': last_article['id']}}, upsert=True)
+    
     # Vérifier si des articles existent déjà
     existing_count = await db.articles.count_documents({})
     if existing_count > 0:
         print(f"ℹ️  Il y a déjà {existing_count} articles dans la base.")
         print("🗑️  Suppression des anciens articles...")
         await db.articles.delete_many({})
+        await db.vocabulary.delete_many({})
+        await db.brands.delete_many({})
         print("✅ Anciens articles supprimés. Ajout des nouveaux...")
     
-    # Get next ID
-    last_article = await db.articles.find_one({}, {'_id': 0, 'id': 1}, sort=[('id', -1)])
-    next_id = (last_article['id'] + 1) if last_article else 1
+    # Réserver d'un coup les ids de tous les articles (un seul aller-retour, pas de doublon avec le serveur)
+    total = len(PIECES_DATA) + len(LIQUIDES_DATA)
+    counter = await db.counters.find_one_and_update(
+        {'_id': 'articles'},
+        {'$inc': {'seq': total}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    next_id = counter['seq'] - total + 1
     
     total_added = 0
     lieux_possibles = [
@@ -1048,8 +1079,6 @@ async def seed_database():
     print("🔧 Ajout des pièces détachées...")
     for piece in PIECES_DATA:
         sku = generate_sku()
-        while await db.articles.find_one({'sku': sku}):
-            sku = generate_sku()
         
         article_data = {
             'id': next_id,
@@ -1062,7 +1091,7 @@ async def seed_database():
             **{k: v for k, v in piece.items() if k != 'lieu'}
         }
         
-        await db.articles.insert_one(article_data)
+        await insert_article(article_data)
         print(f"  ✅ {piece['nom']} - {piece['ref']} (#{next_id})")
         next_id += 1
         total_added += 1
@@ -1071,8 +1100,6 @@ async def seed_database():
     print("\n🛢️  Ajout des huiles et liquides...")
     for liquide in LIQUIDES_DATA:
         sku = generate_sku()
-        while await db.articles.find_one({'sku': sku}):
-            sku = generate_sku()
         
         article_data = {
             'id': next_id,
@@ -1086,7 +1113,7 @@ async def seed_database():
             **liquide
         }
         
-        await db.articles.insert_one(article_data)
+        await insert_article(article_data)
         print(f"  ✅ {liquide['nom']} - {liquide['ref']} ({liquide['litres']}L) (#{next_id})")
         next_id += 1
         total_added += 1
@@ -1103,6 +1130,8 @@ async def seed_database():
     print(f"    Turbo/Admission, Climatisation, Carrosserie, Éclairage, Accessoires")
     print(f"🛢️  Liquides : Huiles moteur, boîte, refroidissement, frein, direction,")
     print(f"    lave-glace, AdBlue, graisses, sprays")
+    print(f"\n👉 Catégories et marques du catalogue : lancer `python migrate.py vocabulary` et `python migrate.py brands`")
+    print(f"   (ou redémarrer le serveur)")
 
 if __name__ == '__main__':
     try:
@@ -1,6 +1,7 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, UploadFile, File, WebSocket, WebSocketDisconnect
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import FileResponse, JSONResponse, StreamingResponse, Response
+from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -8,18 +9,33 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Iterator
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
 import bcrypt
 import random
+import re
 import string
-from openpyxl import Workbook
+import unicodedata
+from openpyxl import Workbook, load_workbook
 from io import BytesIO
 import base64
-from PIL import Image, ImageOps
 import json
+import asyncio
+import bisect
+import csv
+import io
+import itertools
+import hashlib
+import time
+import multiprocessing
+from collections import Counter, OrderedDict
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pydantic import ValidationError
+from concurrent.futures import ProcessPoolExecutor
+from imaging import PHOTO_SIZES, decode_data_url, compress_image, make_derivatives
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -40,6 +56,57 @@ security = HTTPBearer()
 # WebSocket connections
 active_connections: List[WebSocket] = []
 
+# Multipart photo uploads bigger than this are rejected with 413
+MAX_PHOTO_UPLOAD_BYTES = int(os.environ.get('MAX_PHOTO_UPLOAD_BYTES', str(20 * 1024 * 1024)))
+PHOTO_UPLOAD_CHUNK = 64 * 1024
+
+# Image processing pool: PIL work runs in worker processes instead of the event loop
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', os.cpu_count() or 2))
+IMAGE_QUEUE_DEPTH = int(os.environ.get('IMAGE_QUEUE_DEPTH', '32'))
+image_pool: Optional[ProcessPoolExecutor] = None
+image_jobs_pending = 0
+
+# Background tasks started at startup: the event loop only keeps weak references to tasks
+background_tasks: set = set()
+
+# Collection versions, bumped on every write: cached reads of an older version are stale
+collection_versions: Counter = Counter()
+
+# Article list counts and facets per filter (LRU), the TTL covers writes made by other processes (migrate.py, seed)
+COUNT_CACHE_SIZE = 512
+COUNT_CACHE_TTL = int(os.environ.get('COUNT_CACHE_TTL', '300'))
+count_cache: 'OrderedDict[str, Tuple[int, Any, float]]' = OrderedDict()
+facets_cache: 'OrderedDict[str, Tuple[int, Any, float]]' = OrderedDict()
+# Same for the query each search resolves to (build_search_query probes the collection to choose it)
+search_cache: 'OrderedDict[str, Tuple[int, Any, float]]' = OrderedDict()
+
+# Orders numbers taken by other writers are skipped, this many times at most
+COMMANDE_NUMERO_ATTEMPTS = 5
+# Random SKUs drawn again on a duplicate (36^8 possibilities, a retry is already unlikely)
+SKU_ATTEMPTS = 5
+
+# Article ids reserved per block by each process (see IdBlockAllocator), unused ones are skipped after a restart
+ARTICLE_ID_BLOCK = int(os.environ.get('ARTICLE_ID_BLOCK', '10'))
+
+# Public endpoints response cache (see ResponseCache)
+# Versions are in-process counters, the boot id keeps ETags from matching across restarts
+BOOT_ID = uuid.uuid4().hex[:8]
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', '300'))
+# Pubs expire with time (duree_fin), not only on writes
+PUBS_CACHE_TTL = 60
+# Cache-Control per route: browsers revalidate with If-None-Match once max-age is over (304)
+CACHE_CONTROL_CATALOGUE = 'public, max-age=30'
+CACHE_CONTROL_VOCABULARY = 'public, max-age=300'
+CACHE_CONTROL_PUBS = 'public, max-age=60'
+# Theme and phone numbers edited by the admin must show up at once
+CACHE_CONTROL_SETTINGS = 'no-cache'
+CACHE_CONTROL_PRIVATE = 'private, no-cache'
+
+# Brand typeahead: the brands collection kept sorted in memory (see get_brand_index)
+BRAND_TYPEAHEAD_LIMIT = 10
+brand_index: Dict[str, Any] = {'version': None, 'loaded_at': 0.0, 'keys': [], 'entries': []}
+
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
@@ -92,7 +159,7 @@ class Article(BaseModel):
 
 class ArticleCreate(BaseModel):
     type: str
-    photos: List[str] = []
+    photos: List[str] = []  # base64 data URLs or photo store references from POST /photos
     nom: str
     ref: str  # Référence maintenant obligatoire
     description: Optional[str] = None
@@ -127,7 +194,7 @@ class PostIt(BaseModel):
 class PostItCreate(BaseModel):
     objet: str
     message: str
-    photo: Optional[str] = None
+    photo: Optional[str] = None  # base64 data URL or photo store reference from POST /photos
 
 class AgendaEvent(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -185,7 +252,7 @@ class Deal(BaseModel):
 class DealCreate(BaseModel):
     nom: str
     description: Optional[str] = None
-    image: Optional[str] = None
+    image: Optional[str] = None  # base64 data URL or photo store reference from POST /photos
     lien: Optional[str] = None
     prix: float
     prix_ref: Optional[float] = None
@@ -242,6 +309,271 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
 def generate_sku() -> str:
     return 'BMS-' + ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
 
+def is_duplicate_of(error: DuplicateKeyError, field: str) -> bool:
+    return field in ((error.details or {}).get('keyPattern') or {})
+
+async def insert_article_with_sku(article_data: dict) -> str:
+    """Insert a new article with a random SKU, drawing another one on the (rare) duplicate key
+    
+    The unique index on sku makes the check part of the insert: no lookup per article.
+    A duplicate id (counter behind the data) takes a new id from the moved counter.
+    """
+    for _ in range(SKU_ATTEMPTS):
+        article_data.pop('_id', None)
+        article_data['sku'] = generate_sku()
+        article_data.update(article_derived_fields(article_data))
+        try:
+            await db.articles.insert_one(article_data)
+            return article_data['sku']
+        except DuplicateKeyError as e:
+            if is_duplicate_of(e, 'id'):
+                # Ids written without the counter (restored backup...): move it past them
+                await seed_counter('articles', db.articles)
+                article_ids.end = article_ids.next
+                article_data['id'] = await article_ids.next_id()
+            elif not is_duplicate_of(e, 'sku'):
+                raise
+    raise HTTPException(status_code=503, detail='Could not allocate a SKU, please retry')
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque keyset pagination cursor: the id of the last article of the page"""
+    return base64.urlsafe_b64encode(json.dumps({'id': last_id}).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return int(data['id'])
+    except Exception:
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+
+def fold_text(text: str) -> str:
+    """Lowercase and strip accents (é/è/ê -> e) for search keys"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def search_tokens(text: str) -> List[str]:
+    return re.findall(r'[a-z0-9]+', fold_text(text))
+
+def sous_categorie_keys(value: Optional[str]) -> List[str]:
+    """'Alternateur, Démarreur ' -> ['alternateur', 'demarreur']: case, accents and spaces folded"""
+    keys = {' '.join(fold_text(sc).split()) for sc in (value or '').split(',')}
+    return sorted(key for key in keys if key)
+
+def part_number_key(value: str) -> str:
+    """Normalized manufacturer reference / SKU: 'E11 574012068', 'e11-574.012.068' -> 'E11574012068'"""
+    return re.sub(r'[^A-Z0-9]', '', fold_text(value).upper())
+
+def after_id(query: dict, last_id: int) -> dict:
+    """Restrict a query sorted by id descending to the articles after last_id"""
+    if 'id' in query:
+        return {'$and': [query, {'id': {'$lt': last_id}}]}
+    return {**query, 'id': {'$lt': last_id}}
+
+# ID allocation: counters collection, one document per sequence ({'_id': 'articles', 'seq': last id})
+async def allocate_ids(name: str, count: int = 1) -> int:
+    """Atomically reserve count consecutive ids of the sequence name, returns the first one"""
+    counter = await db.counters.find_one_and_update(
+        {'_id': name},
+        {'$inc': {'seq': count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter['seq'] - count + 1
+
+async def seed_counter(name: str, collection) -> int:
+    """Move the sequence past the highest id already in the collection (data written before the counter)"""
+    last = await collection.find_one({}, {'_id': 0, 'id': 1}, sort=[('id', -1)])
+    if last:
+        await db.counters.update_one({'_id': name}, {'$max': {'seq': last['id']}}, upsert=True)
+    return last['id'] if last else 0
+
+class IdBlockAllocator:
+    """Ids of a sequence handed out from blocks reserved by this process, one round trip per block"""
+    def __init__(self, name: str, block_size: int):
+        self.name = name
+        self.block_size = max(1, block_size)
+        self.next = 0
+        self.end = 0
+        self.lock = asyncio.Lock()
+    
+    async def next_id(self) -> int:
+        async with self.lock:
+            if self.next >= self.end:
+                self.next = await allocate_ids(self.name, self.block_size)
+                self.end = self.next + self.block_size
+            self.next += 1
+            return self.next - 1
+
+article_ids = IdBlockAllocator('articles', ARTICLE_ID_BLOCK)
+
+def bump_version(collection: str):
+    collection_versions[collection] += 1
+
+def bump_article_versions(article_ids: List[int]):
+    """After an article write: the collection version and the version of each written article ('articles:<id>')"""
+    bump_version('articles')
+    for article_id in article_ids:
+        bump_version(f'articles:{article_id}')
+
+async def cached_article_read(cache: OrderedDict, query: dict, load):
+    """Result of load(query), cached per normalized filter until the next article write"""
+    key = json.dumps(query, sort_keys=True, default=str)
+    version = collection_versions['articles']
+    cached = cache.get(key)
+    if cached and cached[0] == version and time.monotonic() - cached[2] < COUNT_CACHE_TTL:
+        cache.move_to_end(key)
+        return cached[1]
+    
+    result = await load(query)
+    cache[key] = (version, result, time.monotonic())
+    cache.move_to_end(key)
+    while len(cache) > COUNT_CACHE_SIZE:
+        cache.popitem(last=False)
+    return result
+
+async def count_articles(query: dict) -> int:
+    """count_documents(query), cached until the next article write"""
+    if not query:
+        # Collection metadata, no scan
+        return await db.articles.estimated_document_count()
+    return await cached_article_read(count_cache, query, db.articles.count_documents)
+
+class ResponseCache:
+    """Pre-serialized JSON responses of the public endpoints (LRU, bounded in bytes)
+    
+    Each entry remembers the versions of the collections it was built from and is stale
+    as soon as one of them is bumped, or after its TTL (writes made by other processes).
+    Its headers include the ETag, so a matching If-None-Match is answered from the entry.
+    """
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: 'OrderedDict[str, Tuple[bytes, Dict[str, str], Dict[str, int], float]]' = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Misses served by a build already in flight (see cached_response)
+        self.coalesced = 0
+    
+    def get(self, key: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        entry = self.entries.get(key)
+        if entry:
+            body, headers, versions, expires = entry
+            if time.monotonic() < expires and all(collection_versions[tag] == v for tag, v in versions.items()):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return body, headers
+            self.discard(key)
+        self.misses += 1
+        return None
+    
+    def put(self, key: str, body: bytes, headers: Dict[str, str], versions: Dict[str, int], ttl: Optional[float] = None):
+        if len(body) > self.max_bytes // 4:
+            # Not worth evicting most of the cache for a single response
+            return
+        self.discard(key)
+        self.entries[key] = (body, headers, versions, time.monotonic() + (ttl or self.ttl))
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, (old_body, _, _, _) = self.entries.popitem(last=False)
+            self.size -= len(old_body)
+            self.evictions += 1
+    
+    def discard(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.size -= len(entry[0])
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            'evictions': self.evictions,
+            'coalesced': self.coalesced,
+            'in_flight': len(inflight_builds)
+        }
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL)
+# Single-flight: (cache key, versions) -> build shared by the identical requests arriving meanwhile
+inflight_builds: Dict[Tuple[str, Tuple[int, ...]], asyncio.Task] = {}
+
+def make_etag(versions: Dict[str, int], body: bytes) -> str:
+    """Strong ETag: versions the body was built from (boot id, in-process counters) and its digest
+    
+    The digest keeps the ETag right when the entry is rebuilt after its TTL at the same versions.
+    """
+    version_tag = '.'.join(str(versions[tag]) for tag in sorted(versions))
+    digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+    return f'"{BOOT_ID}-{version_tag}-{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+    # Proxies compressing the body turn strong ETags into weak ones (W/"...")
+    candidates = [candidate.strip().removeprefix('W/') for candidate in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates
+
+async def build_cached_entry(key: str, tags: Tuple[str, ...], build, ttl: Optional[float]) -> Tuple[bytes, Dict[str, str]]:
+    # Versions read before building: a write during the build makes the entry stale right away
+    versions = {tag: collection_versions[tag] for tag in tags}
+    result = await build()
+    response = result if isinstance(result, Response) else JSONResponse(content=jsonable_encoder(result))
+    body = response.body
+    headers = {
+        name: value for name, value in response.headers.items()
+        if name not in ('content-length', 'content-type')
+    }
+    headers['ETag'] = make_etag(versions, body)
+    response_cache.put(key, body, headers, versions, ttl)
+    return body, headers
+
+def end_inflight_build(flight_key: Tuple[str, Tuple[int, ...]], task: asyncio.Task):
+    inflight_builds.pop(flight_key, None)
+    # Errors (404...) are raised to every waiter, mark them retrieved when nobody waits anymore
+    if not task.cancelled():
+        task.exception()
+
+async def cached_response(
+    request: Request,
+    key: str,
+    tags: Tuple[str, ...],
+    build,
+    cache_control: str,
+    ttl: Optional[float] = None
+) -> Response:
+    """Serve build() from the response cache with its ETag, or 304 when the client already has it
+    
+    build may return a JSONResponse to add headers. Nothing is queried nor serialized when the
+    entry is still valid.
+    """
+    cached = response_cache.get(key)
+    if cached:
+        body, headers = cached
+    else:
+        # Concurrent identical misses share one build (one query, one serialization)
+        flight_key = (key, tuple(collection_versions[tag] for tag in tags))
+        task = inflight_builds.get(flight_key)
+        if task:
+            response_cache.coalesced += 1
+        else:
+            task = asyncio.ensure_future(build_cached_entry(key, tags, build, ttl))
+            inflight_builds[flight_key] = task
+            task.add_done_callback(lambda done: end_inflight_build(flight_key, done))
+        # Shielded: a client disconnecting does not cancel the build for the others
+        body, headers = await asyncio.shield(task)
+    
+    headers = {**headers, 'Cache-Control': cache_control}
+    if etag_matches(request, headers['ETag']):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
+
 async def broadcast_notification(message: dict):
     """Send notification to all connected WebSocket clients"""
     disconnected = []
@@ -254,110 +586,663 @@ async def broadcast_notification(message: dict):
     for conn in disconnected:
         active_connections.remove(conn)
 
-def compress_image(base64_str: str, max_size: tuple = (750, 750), quality: int = 75) -> str:
-    """Compress base64 image and fix EXIF orientation"""
+def get_image_pool() -> ProcessPoolExecutor:
+    global image_pool
+    if image_pool is None:
+        # spawn: never fork the event loop, Motor threads and open sockets
+        image_pool = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return image_pool
+
+async def run_image_jobs(func, args_list: List[tuple]) -> list:
+    """Run image jobs in parallel in the process pool, 503 when the queue is full"""
+    global image_jobs_pending
+    if not args_list:
+        return []
+    
+    # A lone batch bigger than the queue is still accepted when the pool is idle
+    if image_jobs_pending and image_jobs_pending + len(args_list) > IMAGE_WORKERS + IMAGE_QUEUE_DEPTH:
+        raise HTTPException(
+            status_code=503,
+            detail='Image processing is busy, please retry',
+            headers={'Retry-After': '5'}
+        )
+    
+    image_jobs_pending += len(args_list)
     try:
-        if not base64_str or not isinstance(base64_str, str):
-            return base64_str
-        
-        # Check if it's a data URL
-        if not base64_str.startswith('data:image'):
-            # Might already be processed or invalid, return as-is
-            return base64_str
-        
-        # Split header and data
-        if ',' not in base64_str:
-            return base64_str
-        
-        header, data = base64_str.split(',', 1)
-        if not data:
-            return base64_str
-        
-        # Decode base64
-        try:
-            img_data = base64.b64decode(data)
-        except Exception as e:
-            print(f"Error decoding base64: {e}")
-            return base64_str
-        
-        if not img_data:
-            return base64_str
-        
-        # Open image
-        try:
-            img = Image.open(BytesIO(img_data))
-        except Exception as e:
-            print(f"Error opening image: {e}")
-            return base64_str
-        
-        # Fix EXIF orientation (rotates image based on EXIF data)
-        # This will automatically rotate the image to the correct orientation
-        try:
-            img = ImageOps.exif_transpose(img)
-        except Exception as exif_err:
-            # If exif_transpose fails, try to get orientation from EXIF manually
-            try:
-                exif = img.getexif()
-                if exif is not None:
-                    orientation = exif.get(274)  # Orientation tag
-                    if orientation == 3:
-                        img = img.rotate(180, expand=True)
-                    elif orientation == 6:
-                        img = img.rotate(270, expand=True)
-                    elif orientation == 8:
-                        img = img.rotate(90, expand=True)
-            except Exception:
-                pass  # If all fails, use image as-is
-        
-        # Convert RGBA to RGB if necessary
-        if img.mode == 'RGBA':
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[3])  # Use alpha channel as mask
-            img = background
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
-        
-        # Resize if needed
-        img.thumbnail(max_size, Image.Resampling.LANCZOS)
-        
-        # Compress and save without EXIF to avoid orientation issues
-        buffer = BytesIO()
-        img.save(buffer, format='JPEG', quality=quality, optimize=True)
-        compressed_data = base64.b64encode(buffer.getvalue()).decode()
+        loop = asyncio.get_running_loop()
+        pool = get_image_pool()
+        return await asyncio.gather(*(loop.run_in_executor(pool, func, *args) for args in args_list))
+    finally:
+        image_jobs_pending -= len(args_list)
+
+async def compress_image_async(base64_str: str) -> str:
+    """compress_image without blocking the event loop"""
+    if not base64_str or not base64_str.startswith('data:image'):
+        return base64_str
+    return (await run_image_jobs(compress_image, [(base64_str,)]))[0]
+
+# Photo store: article photos live in the `photos` collection as raw BSON binary,
+# articles only keep references of the form '/api/photos/<id>' (post-its, deals and pubs may too)
+# Each photo holds its full size in `data` and the smaller PHOTO_SIZES variants in their own fields.
+# Photos are content-addressed (id = sha256 of the full size JPEG), `sources` lists the sha256
+# of the uploads that produced them and `refs` counts the documents using them.
+PHOTO_URL_PREFIX = '/api/photos/'
+# POST /photos stores uploads unreferenced until the form using them is saved:
+# unreferenced photos younger than this are not deleted (sync_photo_refs, rebuild_photo_refs)
+UNREFERENCED_PHOTO_GRACE = timedelta(days=1)
+PHOTO_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+def photo_ref(photo_id: str) -> str:
+    return f'{PHOTO_URL_PREFIX}{photo_id}'
+
+def photo_variant_ref(ref: Optional[str], size: str) -> Optional[str]:
+    """Reference to a smaller size of a store photo (other photos are returned as-is)"""
+    photo_id = photo_id_from_ref(ref)
+    if not photo_id or size == 'full':
+        return ref
+    return f'{photo_ref(photo_id)}?size={size}'
+
+def photo_id_from_ref(ref: str) -> Optional[str]:
+    """Extract the photo id from a store reference (relative or absolute URL)"""
+    if not ref or not isinstance(ref, str):
+        return None
+    index = ref.find(PHOTO_URL_PREFIX)
+    if index != 0 and not (index > 0 and ref.startswith('http')):
+        return None
+    photo_id = ref[index + len(PHOTO_URL_PREFIX):].split('?', 1)[0]
+    return photo_id or None
+
+async def store_photo(variants: Dict[str, bytes], source_hash: Optional[str] = None, acquire: bool = True) -> str:
+    """Save the make_derivatives output into the photo store, returns its content hash id"""
+    photo_id = hashlib.sha256(variants['full']).hexdigest()
+    update = {
+        # An identical photo is never written twice
+        '$setOnInsert': {
+            'id': photo_id,
+            'data': variants['full'],
+            **{name: data for name, data in variants.items() if name != 'full'},
+            'content_type': 'image/jpeg',
+            'size': len(variants['full']),
+            'created_at': datetime.now(timezone.utc).isoformat()
+        },
+        '$inc': {'refs': 1 if acquire else 0}
+    }
+    if source_hash:
+        update['$addToSet'] = {'sources': source_hash}
+    await db.photos.update_one({'id': photo_id}, update, upsert=True)
+    return photo_id
+
+async def store_article_photos(photos: List[str]) -> Tuple[List[str], List[str]]:
+    """Move inline data URL photos into the photo store
+    
+    Returns the photo references and the ids acquired on the way (one ref each),
+    to be passed to sync_photo_refs once the article is written.
+    """
+    stored = []
+    uploads = []  # (position, raw bytes, source hash) of the photos to compress
+    for photo in photos:
+        photo_id = photo_id_from_ref(photo)
+        if photo_id:
+            # Already in the store (the front end sends back what it loaded)
+            stored.append(photo_ref(photo_id))
+            continue
         
-        return f"data:image/jpeg;base64,{compressed_data}"
+        img_data = decode_data_url(photo)
+        if img_data:
+            uploads.append((len(stored), img_data, hashlib.sha256(img_data).hexdigest()))
+        # External URL or unreadable data is kept as-is
+        stored.append(photo)
+    
+    if not uploads:
+        return stored, []
+    
+    # Uploads seen before are not re-encoded, only their reference count changes
+    known = {}
+    async for photo in db.photos.find(
+        {'sources': {'$in': [source_hash for _, _, source_hash in uploads]}},
+        {'_id': 0, 'id': 1, 'sources': 1}
+    ):
+        for source_hash in photo['sources']:
+            known[source_hash] = photo['id']
+    
+    reused = []
+    new_uploads = []
+    for position, img_data, source_hash in uploads:
+        if source_hash in known:
+            reused.append((position, img_data, source_hash, known[source_hash]))
+        else:
+            new_uploads.append((position, img_data, source_hash))
+    
+    acquired = []
+    if reused:
+        # One update per photo to know which ones matched: a photo released by another
+        # request between the lookup and here is gone and must be stored again
+        counts = Counter(photo_id for _, _, _, photo_id in reused)
+        results = await asyncio.gather(*(
+            db.photos.update_one({'id': photo_id}, {'$inc': {'refs': count}})
+            for photo_id, count in counts.items()
+        ))
+        gone = {photo_id for photo_id, result in zip(counts, results) if not result.matched_count}
+        for position, img_data, source_hash, photo_id in reused:
+            if photo_id in gone:
+                new_uploads.append((position, img_data, source_hash))
+            else:
+                acquired.append(photo_id)
+                stored[position] = photo_ref(photo_id)
+    
+    # Compress all the new photos of the request in parallel
+    derivatives = await run_image_jobs(make_derivatives, [(img_data,) for _, img_data, _ in new_uploads])
+    for (position, _, source_hash), variants in zip(new_uploads, derivatives):
+        # Keep the original photo if it could not be processed
+        if variants is not None:
+            photo_id = await store_photo(variants, source_hash)
+            acquired.append(photo_id)
+            stored[position] = photo_ref(photo_id)
+    return stored, acquired
+
+async def sync_photo_refs(old_refs: List[str], new_refs: List[str], acquired: Optional[List[str]] = None):
+    """Update photo reference counts after an article went from old_refs to new_refs
+    
+    acquired holds the ids store_article_photos already counted once.
+    Photos nobody references any more are deleted, unless uploaded less than
+    UNREFERENCED_PHOTO_GRACE ago: POST /photos may have just handed them to a form.
+    """
+    old_ids = {photo_id for photo_id in map(photo_id_from_ref, old_refs) if photo_id}
+    new_ids = {photo_id for photo_id in map(photo_id_from_ref, new_refs) if photo_id}
+    
+    deltas = Counter({photo_id: 1 for photo_id in new_ids - old_ids})
+    deltas.subtract({photo_id: 1 for photo_id in old_ids - new_ids})
+    deltas.subtract(Counter(acquired or []))
+    deltas = {photo_id: delta for photo_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    
+    await db.photos.bulk_write(
+        [UpdateOne({'id': photo_id}, {'$inc': {'refs': delta}}) for photo_id, delta in deltas.items()],
+        ordered=False
+    )
+    released = [photo_id for photo_id, delta in deltas.items() if delta < 0]
+    if released:
+        cutoff = (datetime.now(timezone.utc) - UNREFERENCED_PHOTO_GRACE).isoformat()
+        await db.photos.delete_many({'id': {'$in': released}, 'refs': {'$lte': 0}, 'created_at': {'$lt': cutoff}})
+
+async def stored_photo_ids(photo_ids) -> set:
+    """The given photo ids that exist in the store"""
+    if not photo_ids:
+        return set()
+    return {photo['id'] async for photo in db.photos.find({'id': {'$in': list(photo_ids)}}, {'_id': 0, 'id': 1})}
+
+async def check_photo_refs(refs: List[Optional[str]]):
+    """400 when a photo store reference points to no stored photo (deleted, or never uploaded)"""
+    photo_ids = {photo_id for photo_id in map(photo_id_from_ref, refs) if photo_id}
+    missing = sorted(photo_ids - await stored_photo_ids(photo_ids))
+    if missing:
+        raise HTTPException(status_code=400, detail=f'Unknown photo: {photo_ref(missing[0])}')
+
+async def backfill_photo_sizes() -> dict:
+    """Generate the smaller sizes of store photos saved before they existed"""
+    photos_updated = 0
+    
+    smallest = min(PHOTO_SIZES, key=PHOTO_SIZES.get)
+    cursor = db.photos.find(
+        {smallest: {'$exists': False}},
+        {'_id': 0, 'id': 1, 'data': 1}
+    ).batch_size(20)
+    async for photo in cursor:
+        variants = (await run_image_jobs(make_derivatives, [(bytes(photo['data']),)]))[0]
+        if variants is None:
+            continue
+        # Keep the existing full size, its id already points to those bytes
+        await db.photos.update_one(
+            {'id': photo['id']},
+            {'$set': {name: data for name, data in variants.items() if name != 'full'}}
+        )
+        photos_updated += 1
+    
+    return {'photos_updated': photos_updated}
+
+async def rebuild_photo_refs() -> dict:
+    """Recount the articles, post-its, deals and pubs using each store photo and delete the unused ones (run while idle)
+    
+    Photos uploaded less than UNREFERENCED_PHOTO_GRACE ago are kept even when unused,
+    they may belong to a form that is still open.
+    """
+    counts = Counter()
+    cursor = db.articles.find({'photos.0': {'$exists': True}}, {'_id': 0, 'photos': 1}).batch_size(500)
+    async for article in cursor:
+        counts.update({photo_id for photo_id in map(photo_id_from_ref, article['photos']) if photo_id})
+    async for postit in db.postits.find({'photo': {'$regex': f'^{PHOTO_URL_PREFIX}'}}, {'_id': 0, 'photo': 1}):
+        counts[photo_id_from_ref(postit['photo'])] += 1
+    async for deal in db.deals.find({'image': {'$regex': f'^{PHOTO_URL_PREFIX}'}}, {'_id': 0, 'image': 1}):
+        counts[photo_id_from_ref(deal['image'])] += 1
+    async for pub in db.pubs.find({'image': {'$regex': f'^{PHOTO_URL_PREFIX}'}}, {'_id': 0, 'image': 1}):
+        counts[photo_id_from_ref(pub['image'])] += 1
+    
+    await db.photos.update_many({}, {'$set': {'refs': 0}})
+    photo_ids = list(counts)
+    for start in range(0, len(photo_ids), 1000):
+        await db.photos.bulk_write(
+            [UpdateOne({'id': photo_id}, {'$set': {'refs': counts[photo_id]}}) for photo_id in photo_ids[start:start + 1000]],
+            ordered=False
+        )
+    cutoff = (datetime.now(timezone.utc) - UNREFERENCED_PHOTO_GRACE).isoformat()
+    deleted = await db.photos.delete_many({'refs': {'$lte': 0}, 'created_at': {'$lt': cutoff}})
+    
+    return {'photos_referenced': len(photo_ids), 'photos_deleted': deleted.deleted_count}
+
+# Materialized article fields: computed from the article on every write so list endpoints
+# read them directly. Bump ARTICLE_FIELDS_VERSION when a field is added or its rule changes,
+# backfill_article_fields then recomputes every older article.
+ARTICLE_FIELDS_VERSION = 6
+
+# Materialized fields only used by queries, left out of the article details
+ARTICLE_INTERNAL_FIELDS = (
+    'search_terms', 'sous_categorie_keys', 'ref_key', 'sku_key', 'marque_key',
+    'catalogue_visible', 'fields_version', 'photos_version'
+)
+ARTICLE_DETAIL_PROJECTION = {'_id': 0, **{field: 0 for field in ARTICLE_INTERNAL_FIELDS}}
+
+# Fields whose folded tokens are matched by prefix when the text index finds nothing
+SEARCH_TERMS_FIELDS = ('nom', 'ref', 'sku', 'marque', 'categorie')
+
+def is_catalogue_visible(article: dict) -> bool:
+    """Shown in the public catalogue: public and in stock (quantite for pieces, litres for liquids)"""
+    if not article.get('public'):
+        return False
+    if article.get('type') == 'piece':
+        return (article.get('quantite') or 0) > 0
+    if article.get('type') == 'liquide':
+        return (article.get('litres') or 0) > 0
+    return False
+
+def article_derived_fields(article: dict) -> dict:
+    photo_count = len(article.get('photos') or [])
+    search_terms = set()
+    for field in SEARCH_TERMS_FIELDS:
+        search_terms.update(search_tokens(str(article.get(field) or '')))
+    return {
+        'photo_count': photo_count,
+        'has_photo': photo_count > 0,
+        'search_terms': sorted(search_terms),
+        'ref_key': part_number_key(article.get('ref') or '') or None,
+        'sku_key': part_number_key(article.get('sku') or '') or None,
+        'catalogue_visible': is_catalogue_visible(article),
+        'sous_categorie_keys': sous_categorie_keys(article.get('sous_categorie')),
+        'marque_key': brand_key(article.get('marque') or '') or None,
+        'fields_version': ARTICLE_FIELDS_VERSION
+    }
+
+async def backfill_article_fields() -> dict:
+    """Recompute the materialized fields of articles written by an older version"""
+    articles_updated = 0
+    
+    cursor = db.articles.find(
+        {'fields_version': {'$ne': ARTICLE_FIELDS_VERSION}},
+        {'_id': 0}
+    ).batch_size(500)
+    batch, batch_ids = [], []
+    async for article in cursor:
+        # Skip articles rewritten by the current version in the meantime
+        batch.append(UpdateOne(
+            {'id': article['id'], 'fields_version': {'$ne': ARTICLE_FIELDS_VERSION}},
+            {'$set': article_derived_fields(article)}
+        ))
+        batch_ids.append(article['id'])
+        if len(batch) >= 500:
+            await db.articles.bulk_write(batch, ordered=False)
+            bump_article_versions(batch_ids)
+            articles_updated += len(batch)
+            batch, batch_ids = [], []
+    if batch:
+        await db.articles.bulk_write(batch, ordered=False)
+        bump_article_versions(batch_ids)
+        articles_updated += len(batch)
+    
+    return {'articles_updated': articles_updated}
+
+# Vocabulary: (categorie, sous_categorie) pairs with the number of articles using them
+def article_vocab_pairs(article: Optional[dict]) -> List[Tuple[str, str]]:
+    """Pairs of an article, sous_categorie is stored as 'sc1, sc2' and counted per sub-category"""
+    if not article:
+        return []
+    categorie = (article.get('categorie') or '').strip()
+    sous_categories = {sc.strip() for sc in (article.get('sous_categorie') or '').split(',') if sc.strip()}
+    if not sous_categories:
+        return [(categorie, '')] if categorie else []
+    return [(categorie, sc) for sc in sorted(sous_categories)]
+
+async def apply_vocab_delta(delta: Counter):
+    ops = [
+        UpdateOne({'categorie': categorie, 'sous_categorie': sous_categorie}, {'$inc': {'count': n}}, upsert=True)
+        for (categorie, sous_categorie), n in delta.items() if n
+    ]
+    if not ops:
+        return
+    await db.vocabulary.bulk_write(ops, ordered=False)
+    if any(n < 0 for n in delta.values()):
+        await db.vocabulary.delete_many({'count': {'$lte': 0}})
+    bump_version('vocabulary')
+
+async def sync_article_vocab(old: Optional[dict], new: Optional[dict]):
+    """Move the vocabulary counts from the old version of an article to the new one (None when created/deleted)"""
+    delta = Counter(article_vocab_pairs(new))
+    delta.subtract(article_vocab_pairs(old))
+    await apply_vocab_delta(delta)
+
+async def rebuild_vocabulary() -> dict:
+    """Recount the vocabulary from the articles"""
+    counts = Counter()
+    async for article in db.articles.find({}, {'_id': 0, 'categorie': 1, 'sous_categorie': 1}).batch_size(1000):
+        counts.update(article_vocab_pairs(article))
+    
+    ops = [
+        UpdateOne({'categorie': categorie, 'sous_categorie': sous_categorie}, {'$set': {'count': n}}, upsert=True)
+        for (categorie, sous_categorie), n in counts.items()
+    ]
+    if ops:
+        await db.vocabulary.bulk_write(ops, ordered=False)
+    # Pairs no article uses anymore
+    removed = 0
+    async for entry in db.vocabulary.find({}, {'_id': 1, 'categorie': 1, 'sous_categorie': 1}):
+        if (entry['categorie'], entry['sous_categorie']) not in counts:
+            await db.vocabulary.delete_one({'_id': entry['_id']})
+            removed += 1
+    bump_version('vocabulary')
+    
+    return {'pairs': len(counts), 'removed': removed}
+
+# Brands: one document per normalized marque with its article / public article counts
+def brand_key(name: str) -> str:
+    """'  Mann  Filter' / 'MANN FILTER' / 'mann filter' -> 'mann filter' (accents folded too)"""
+    return ' '.join(fold_text(name).split())
+
+def brand_name(marque: Optional[str]) -> str:
+    return ' '.join((marque or '').split())
+
+def article_brand_counts(article: Optional[dict]) -> Counter:
+    counts = Counter()
+    nom = brand_name((article or {}).get('marque'))
+    if nom:
+        counts[(brand_key(nom), 'count')] += 1
+        if article.get('public'):
+            counts[(brand_key(nom), 'public_count')] += 1
+    return counts
+
+async def sync_article_brands(old: Optional[dict], new: Optional[dict]):
+    """Move the brand counts from the old version of an article to the new one (None when created/deleted)"""
+    delta = article_brand_counts(new)
+    delta.subtract(article_brand_counts(old))
+    nom = brand_name((new or {}).get('marque'))
+    await apply_brand_delta(delta, {brand_key(nom): nom} if nom else {})
+
+async def apply_brand_delta(delta: Counter, noms: Dict[str, str]):
+    """Apply (key, count field) -> n to the brands, noms gives the spelling of the brands created"""
+    incs: Dict[str, Dict[str, int]] = {}
+    for (key, field), n in delta.items():
+        if n:
+            incs.setdefault(key, {'count': 0, 'public_count': 0})[field] = n
+    if not incs:
+        return
+    await db.brands.bulk_write([
+        UpdateOne(
+            {'key': key},
+            # The first spelling seen is the displayed one
+            {'$inc': inc, '$setOnInsert': {'nom': noms.get(key, key)}},
+            upsert=True
+        )
+        for key, inc in incs.items()
+    ], ordered=False)
+    if any(n < 0 for n in delta.values()):
+        await db.brands.delete_many({'count': {'$lte': 0}})
+    bump_version('brands')
+
+async def rebuild_brands() -> dict:
+    """Recount the brands from the articles"""
+    counts = Counter()
+    noms: Dict[str, Counter] = {}
+    async for article in db.articles.find(
+        {'marque': {'$nin': [None, '']}},
+        {'_id': 0, 'marque': 1, 'public': 1}
+    ).batch_size(1000):
+        counts.update(article_brand_counts(article))
+        nom = brand_name(article['marque'])
+        if nom:
+            noms.setdefault(brand_key(nom), Counter())[nom] += 1
+    
+    ops = [
+        UpdateOne(
+            {'key': key},
+            # Most used spelling
+            {'$set': {
+                'nom': spellings.most_common(1)[0][0],
+                'count': counts[(key, 'count')],
+                'public_count': counts[(key, 'public_count')]
+            }},
+            upsert=True
+        )
+        for key, spellings in noms.items()
+    ]
+    if ops:
+        await db.brands.bulk_write(ops, ordered=False)
+    result = await db.brands.delete_many({'key': {'$nin': list(noms)}})
+    bump_version('brands')
+    
+    return {'brands': len(noms), 'removed': result.deleted_count}
+
+async def get_brand_index() -> Dict[str, Any]:
+    """Brands sorted by key in memory for the typeahead, reloaded after a brand write"""
+    version = collection_versions['brands']
+    if brand_index['version'] != version or time.monotonic() - brand_index['loaded_at'] > COUNT_CACHE_TTL:
+        entries = await db.brands.find({'count': {'$gt': 0}}, {'_id': 0}).sort('key', 1).to_list(None)
+        brand_index.update({
+            'version': version,
+            'loaded_at': time.monotonic(),
+            'keys': [entry['key'] for entry in entries],
+            'entries': entries
+        })
+    return brand_index
+
+async def lookup_brands(prefix: Optional[str], limit: Optional[int], count_field: str) -> List[str]:
+    """Brand names with count_field > 0: all of them sorted by name, or the most used ones starting with prefix"""
+    index = await get_brand_index()
+    if not prefix or not brand_key(prefix):
+        names = sorted(entry['nom'] for entry in index['entries'] if entry.get(count_field, 0) > 0)
+        return names[:limit] if limit else names
+    
+    key = brand_key(prefix)
+    start = bisect.bisect_left(index['keys'], key)
+    end = bisect.bisect_left(index['keys'], key + '\uffff', lo=start)
+    matches = [entry for entry in index['entries'][start:end] if entry.get(count_field, 0) > 0]
+    matches.sort(key=lambda entry: (-entry[count_field], entry['key']))
+    return [entry['nom'] for entry in matches[:limit or BRAND_TYPEAHEAD_LIMIT]]
+
+# Search dispatch: what the garage staff type is mostly a part number
+MAX_INT64 = 2 ** 63 - 1
+SKU_SEARCH = re.compile(r'^BMS-?[A-Z0-9]{8}$', re.IGNORECASE)
+# Letters, digits and separators with at least one digit: 'E11 574012068', '0 124 525 015', 'D6RA133'
+REF_SEARCH = re.compile(r'^(?=.*\d)[A-Za-z0-9][A-Za-z0-9 .\-/]*$')
+
+def with_filters(query: dict, clause: dict) -> dict:
+    return {'$and': [query, clause]} if query else clause
+
+async def build_articles_query(
+    search: Optional[str],
+    category: Optional[str],
+    sous_category: Optional[str],
+    etat: Optional[str],
+    type: Optional[str]
+) -> Tuple[dict, bool]:
+    """Filters of the articles list ('all' means no filter), returns (query, ranked)"""
+    query = {}
+    
+    # Category filter
+    if category and category != 'all':
+        query['categorie'] = category
+    
+    # Sous-category filter: one of the article sub-categories (multikey index on sous_categorie_keys)
+    if sous_category and sous_category != 'all':
+        keys = sous_categorie_keys(sous_category)
+        query['sous_categorie_keys'] = {'$in': keys} if len(keys) > 1 else (keys[0] if keys else '')
+    
+    # État filter
+    if etat and etat != 'all':
+        query['etat'] = etat
+    
+    # Type filter
+    if type and type != 'all':
+        query['type'] = type
+    
+    # Search (part numbers, text index, prefix fallback), probed once per search and filters
+    if search and search.strip():
+        return await cached_article_read(search_cache, {'search': search.strip(), 'filters': query}, resolve_search)
+    return query, False
+
+async def resolve_search(key: dict) -> Tuple[dict, bool]:
+    return await build_search_query(key['search'], key['filters'])
+
+async def build_search_query(search: str, query: dict) -> Tuple[dict, bool]:
+    """Add the search to the article filters, returns (query, ranked)
+    
+    - digits only: exact id, or a reference starting with them (ref_key index)
+    - BMS-XXXXXXXX: exact SKU (sku_key index)
+    - reference-like token: prefix of the normalized ref/SKU, if any article has one
+    - anything else: text search (build_text_search_query)
+    """
+    key = part_number_key(search)
+    # ASCII only: '²' is a digit for str.isdigit but not for int()
+    if search.isascii() and search.isdigit():
+        clauses = [{'ref_key': {'$regex': f'^{key}'}}]
+        # Ids are int64 in Mongo, a longer number can only be a reference
+        if int(search) <= MAX_INT64:
+            clauses.insert(0, {'id': int(search)})
+        return with_filters(query, {'$or': clauses}), False
+    
+    if SKU_SEARCH.match(search):
+        return with_filters(query, {'sku_key': key}), False
+    
+    if REF_SEARCH.match(search) and key:
+        ref_query = with_filters(query, {'$or': [
+            {'ref_key': {'$regex': f'^{key}'}},
+            {'sku_key': {'$regex': f'^{key}'}}
+        ]})
+        # 'Clio 3' looks like a reference too: fall through to the text search when nothing matches
+        if await db.articles.find_one(ref_query, {'_id': 0, 'id': 1}):
+            return ref_query, False
+    
+    return await build_text_search_query(search, query)
+
+async def build_text_search_query(search: str, query: dict) -> Tuple[dict, bool]:
+    """Add a free text search to the article filters, returns (query, ranked)
+    
+    Whole words go through the French text index: stemmed, accent-insensitive and ranked
+    by textScore. When that finds nothing (usually a word still being typed) every token
+    is matched as a prefix of the indexed search_terms instead, unranked.
+    """
+    text_query = {**query, '$text': {'$search': search}}
+    if await db.articles.find_one(text_query, {'_id': 0, 'id': 1}):
+        return text_query, True
+    
+    prefixes = [{'search_terms': {'$regex': f'^{re.escape(token)}'}} for token in search_tokens(search)]
+    if not prefixes:
+        return text_query, True
+    return {'$and': [query, *prefixes]}, False
+
+async def ensure_index(collection, keys, **kwargs) -> bool:
+    """create_index, a failure (duplicates for a unique index...) only skips this index"""
+    try:
+        await collection.create_index(keys, **kwargs)
+        return True
     except Exception as e:
-        print(f"Error compressing image: {e}")
-        import traceback
-        traceback.print_exc()
-        return base64_str
+        print(f"Warning: Could not create index {keys} on {collection.name}: {e}")
+        return False
+
+async def ensure_unique_index(collection, field: str, replaces: str) -> bool:
+    """Unique index on field, the former non-unique index replaces is dropped once it is built"""
+    if not await ensure_index(collection, [(field, 1)], name=f'{field}_unique', unique=True, background=True):
+        return False
+    if replaces in await collection.index_information():
+        await collection.drop_index(replaces)
+    return True
+
+def start_background_task(coroutine) -> asyncio.Task:
+    """create_task that keeps the task referenced until it is done (otherwise it may be garbage collected)"""
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
 
 # Initialize admin user
 @app.on_event("startup")
 async def startup_event():
-    # Create indexes for better query performance
-    try:
-        # Index on articles.id for sorting
-        await db.articles.create_index([('id', -1)], background=True)
-        # Index on articles.public for filtering
-        await db.articles.create_index([('public', 1)], background=True)
-        # Compound index for public articles sorted by id
-        await db.articles.create_index([('public', 1), ('id', -1)], background=True)
-        
-        # Index on postits.date for sorting
-        await db.postits.create_index([('date', -1)], background=True)
-        
-        # Index on deals.date for sorting
-        await db.deals.create_index([('date', -1)], background=True)
-        # Index on deals.posted_by for filtering
-        await db.deals.create_index([('posted_by', 1)], background=True)
-        
-        # Index on commandes.date for sorting
-        await db.commandes.create_index([('date', -1)], background=True)
-        # Index on commandes.numero for sorting
-        await db.commandes.create_index([('numero', -1)], background=True)
-    except Exception as e:
-        print(f"Warning: Could not create indexes (they may already exist): {e}")
+    # Create indexes for better query performance (each one on its own, see ensure_index)
+    # Unique index on articles.id (allocated by the counters collection), also used for sorting
+    if not await ensure_unique_index(db.articles, 'id', replaces='id_-1'):
+        await ensure_index(db.articles, [('id', -1)], background=True)
+    # Unique index on articles.sku: generated SKUs are checked by the insert itself
+    await ensure_index(db.articles, [('sku', 1)], name='sku_unique', unique=True, sparse=True, background=True)
+    # Index on articles.public for filtering
+    await ensure_index(db.articles, [('public', 1)], background=True)
+    # Compound index for public articles sorted by id
+    await ensure_index(db.articles, [('public', 1), ('id', -1)], background=True)
+    # French full-text index for the inventory search (diacritic-insensitive, ranked)
+    await ensure_index(
+        db.articles,
+        [('nom', 'text'), ('ref', 'text'), ('sku', 'text'), ('marque', 'text'),
+         ('categorie', 'text'), ('description', 'text')],
+        name='articles_text',
+        default_language='french',
+        weights={'nom': 10, 'ref': 8, 'sku': 8, 'marque': 5, 'categorie': 3, 'description': 1},
+        background=True
+    )
+    # Multikey index on the folded search tokens for prefix search
+    await ensure_index(db.articles, [('search_terms', 1)], background=True)
+    # Indexes on the normalized part numbers for the search dispatcher
+    await ensure_index(db.articles, [('ref_key', 1)], background=True)
+    await ensure_index(db.articles, [('sku_key', 1)], background=True)
+    # Multikey index on the normalized sub-categories for the sous_category filter
+    await ensure_index(db.articles, [('sous_categorie_keys', 1)], background=True)
+    # Index on the normalized brand for the catalogue marque filter
+    await ensure_index(db.articles, [('marque_key', 1)], background=True)
+    # Partial index of the public catalogue listing (public and in stock), sorted by id
+    await ensure_index(
+        db.articles,
+        [('id', -1)],
+        name='catalogue_visible_id',
+        partialFilterExpression={'catalogue_visible': True},
+        background=True
+    )
+    
+    # Index on postits.date for sorting
+    await ensure_index(db.postits, [('date', -1)], background=True)
+    
+    # Index on deals.date for sorting
+    await ensure_index(db.deals, [('date', -1)], background=True)
+    # Index on deals.posted_by for filtering
+    await ensure_index(db.deals, [('posted_by', 1)], background=True)
+    
+    # Index on commandes.date for sorting
+    await ensure_index(db.commandes, [('date', -1)], background=True)
+    # Unique index on commandes.numero (allocated by the per-year counters), also used for sorting
+    if not await ensure_unique_index(db.commandes, 'numero', replaces='numero_-1'):
+        await ensure_index(db.commandes, [('numero', -1)], background=True)
+    
+    # Unique index on photos.id for the photo store lookups
+    await ensure_index(db.photos, [('id', 1)], unique=True, background=True)
+    # Index on photos.sources to skip re-encoding known uploads
+    await ensure_index(db.photos, [('sources', 1)], background=True)
+    # Index on jobs.id for background job progress
+    await ensure_index(db.jobs, [('id', 1)], unique=True, background=True)
+    # Unique index on the vocabulary pairs for the incremental counts
+    await ensure_index(db.vocabulary, [('categorie', 1), ('sous_categorie', 1)], unique=True, background=True)
+    # Unique index on the normalized brand names
+    await ensure_index(db.brands, [('key', 1)], unique=True, background=True)
+    
+    # Articles and orders created before the counters collection (or by an older seed script)
+    await seed_counter('articles', db.articles)
+    await seed_commande_counter(datetime.now(timezone.utc).year)
     
     # Create admin user if not exists
     admin = await db.users.find_one({'username': 'AdminLudo'})
@@ -387,6 +1272,20 @@ async def startup_event():
             updates['deal_email'] = None
         if updates:
             await db.settings.update_one({}, {'$set': updates})
+    
+    # Bring articles written before the current materialized fields up to date
+    start_background_task(backfill_article_fields())
+    
+    # First start with the vocabulary collection: build it from the existing articles
+    if not await db.vocabulary.find_one({}, {'_id': 1}) and await db.articles.find_one({}, {'_id': 1}):
+        start_background_task(rebuild_vocabulary())
+    if not await db.brands.find_one({}, {'_id': 1}) and await db.articles.find_one({}, {'_id': 1}):
+        start_background_task(rebuild_brands())
+    
+    # Resume the fix images job if the server stopped while it was running
+    job = await db.jobs.find_one({'id': FIX_IMAGES_JOB}, {'_id': 0, 'status': 1})
+    if job and job.get('status') == 'running':
+        await launch_fix_images_job()
 
 # WebSocket endpoint
 @api_router.websocket("/ws")
@@ -496,7 +1395,9 @@ async def get_liquides(user_data: dict = Depends(verify_token)):
         'viscosite': 1,
         'marque': 1,
         'norme': 1,
-        'usage': 1
+        'usage': 1,
+        'has_photo': 1,
+        'photo_count': 1
     }
     
     liquides = await db.articles.find(
@@ -504,16 +1405,9 @@ async def get_liquides(user_data: dict = Depends(verify_token)):
         projection
     ).sort('id', -1).allow_disk_use(True).to_list(10000)
     
-    # Add has_photo flag
-    article_ids = [a['id'] for a in liquides]
-    photos_check = await db.articles.find(
-        {'id': {'$in': article_ids}, 'photos.0': {'$exists': True}},
-        {'_id': 0, 'id': 1}
-    ).to_list(10000)
-    articles_with_photos = {doc['id'] for doc in photos_check}
-    
     for liquide in liquides:
-        liquide['has_photo'] = liquide['id'] in articles_with_photos
+        # Not backfilled yet (see backfill_article_fields)
+        liquide.setdefault('has_photo', False)
         liquide['photos'] = []
     
     return liquides
@@ -522,6 +1416,7 @@ async def get_liquides(user_data: dict = Depends(verify_token)):
 async def get_articles(
     page: int = 1,
     limit: int = 30,
+    cursor: str = None,
     search: str = None,
     category: str = None,
     sous_category: str = None,
@@ -529,39 +1424,20 @@ async def get_articles(
     type: str = None,
     user_data: dict = Depends(verify_token)
 ):
-    """Get articles with pagination and filters - only essential fields for list view"""
-    skip = (page - 1) * limit
-    
-    # Build query filter
-    query = {}
-    
-    # Search in multiple fields
-    if search:
-        query['$or'] = [
-            {'nom': {'$regex': search, '$options': 'i'}},
-            {'ref': {'$regex': search, '$options': 'i'}},
-            {'sku': {'$regex': search, '$options': 'i'}},
-            {'id': {'$regex': search, '$options': 'i'}}
-        ]
-    
-    # Category filter
-    if category and category != 'all':
-        query['categorie'] = category
-    
-    # Sous-category filter
-    if sous_category and sous_category != 'all':
-        query['sous_categorie'] = {'$regex': sous_category, '$options': 'i'}
+    """Get articles with pagination and filters - only essential fields for list view
     
-    # État filter
-    if etat and etat != 'all':
-        query['etat'] = etat
+    Pass the returned next_cursor as cursor to get the following page: it seeks on the id
+    index instead of skipping, so deep pages cost the same as the first one (page is then ignored).
+    Ranked search results are sorted by relevance and only paginate with page.
+    """
+    skip = (page - 1) * limit
     
-    # Type filter
-    if type and type != 'all':
-        query['type'] = type
+    query, ranked = await build_articles_query(search, category, sous_category, etat, type)
+    if ranked:
+        cursor = None
     
-    # Get total count with filters
-    total = await db.articles.count_documents(query)
+    # Get total count with filters (page mode only, cursor mode already got it on the first page)
+    total = None if cursor else await count_articles(query)
     
     # Projection: only load essential fields for list display (NO PHOTOS to reduce payload)
     projection = {
@@ -579,23 +1455,26 @@ async def get_articles(
         'litres': 1,
         'prix_vente': 1,
         'marque': 1,
-        'photos': {'$slice': 0}
+        'has_photo': 1,
+        'photo_count': 1
     }
     
     # Get paginated and filtered articles
-    cursor = db.articles.find(query, projection).sort('id', -1).skip(skip).limit(limit)
-    articles = await cursor.to_list(limit)
-    
-    # Add has_photo flag
-    article_ids = [a['id'] for a in articles]
-    photos_check = await db.articles.find(
-        {'id': {'$in': article_ids}, 'photos.0': {'$exists': True}},
-        {'_id': 0, 'id': 1}
-    ).to_list(100)
-    articles_with_photos = {doc['id'] for doc in photos_check}
+    if ranked:
+        projection['score'] = {'$meta': 'textScore'}
+        find = db.articles.find(query, projection).sort(
+            [('score', {'$meta': 'textScore'}), ('id', -1)]
+        ).skip(skip)
+    elif cursor:
+        find = db.articles.find(after_id(query, decode_cursor(cursor)), projection).sort('id', -1)
+    else:
+        find = db.articles.find(query, projection).sort('id', -1).skip(skip)
+    articles = await find.limit(limit).to_list(limit)
     
     for article in articles:
-        article['has_photo'] = article['id'] in articles_with_photos
+        # Not backfilled yet (see backfill_article_fields)
+        article.setdefault('has_photo', False)
+        article.pop('score', None)
         article['photos'] = []
     
     return {
@@ -603,88 +1482,190 @@ async def get_articles(
         'total': total,
         'page': page,
         'limit': limit,
-        'total_pages': (total + limit - 1) // limit
+        'total_pages': (total + limit - 1) // limit if total is not None else None,
+        'next_cursor': encode_cursor(articles[-1]['id']) if len(articles) == limit and not ranked else None
     }
 
+# Facets of the filter sidebar, in the order they are displayed
+ARTICLE_FACETS = ('categorie', 'sous_categorie', 'etat', 'type', 'marque')
+
+def facet_stages(field: str) -> List[dict]:
+    if field == 'sous_categorie':
+        # Counted per sub-category like the sous_category filter matches them, not per 'sc1, sc2' string
+        stages = [{'$unwind': '$sous_categorie_keys'}, {'$group': {'_id': '$sous_categorie_keys', 'count': {'$sum': 1}}}]
+    elif field == 'marque':
+        # Per normalized brand like the marque filter, not per raw spelling ('MANN  FILTER', ' mann filter')
+        stages = [{'$match': {'marque_key': {'$nin': [None, '']}}}, {'$group': {'_id': '$marque_key', 'count': {'$sum': 1}}}]
+    else:
+        stages = [{'$match': {field: {'$nin': [None, '']}}}, {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}}]
+    # Most used first, alphabetical between equal counts
+    return stages + [{'$sort': {'count': -1, '_id': 1}}]
+
+async def sous_categorie_names() -> Dict[str, str]:
+    """Display name of each sous_categorie_keys key: its most used spelling in the vocabulary"""
+    names = {}
+    cursor = db.vocabulary.find({'sous_categorie': {'$ne': ''}, 'count': {'$gt': 0}}, {'_id': 0, 'sous_categorie': 1, 'count': 1})
+    for entry in sorted(await cursor.to_list(None), key=lambda entry: -entry['count']):
+        for key in sous_categorie_keys(entry['sous_categorie']):
+            names.setdefault(key, entry['sous_categorie'])
+    return names
+
+async def aggregate_facets(query: dict) -> dict:
+    pipeline = []
+    if query:
+        pipeline.append({'$match': query})
+    pipeline.append({'$facet': {field: facet_stages(field) for field in ARTICLE_FACETS}})
+    result = await db.articles.aggregate(pipeline).to_list(1)
+    facets = result[0] if result else {}
+    
+    # Sub-category and brand keys are folded: shown with the spelling /categories and /marques use
+    names = await sous_categorie_names() if facets.get('sous_categorie') else {}
+    for bucket in facets.get('sous_categorie', []):
+        bucket['_id'] = names.get(bucket['_id'], bucket['_id'])
+    if facets.get('marque'):
+        brands = {entry['key']: entry['nom'] for entry in (await get_brand_index())['entries']}
+        for bucket in facets['marque']:
+            bucket['_id'] = brands.get(bucket['_id'], bucket['_id'])
+    return {
+        field: [{'value': bucket['_id'], 'count': bucket['count']} for bucket in facets.get(field, [])]
+        for field in ARTICLE_FACETS
+    }
+
+@api_router.get("/articles/facets")
+async def get_article_facets(
+    search: str = None,
+    category: str = None,
+    sous_category: str = None,
+    etat: str = None,
+    type: str = None,
+    user_data: dict = Depends(verify_token)
+):
+    """Counts per categorie, sous_categorie, etat, type and marque for the get_articles filters"""
+    query, _ = await build_articles_query(search, category, sous_category, etat, type)
+    return await cached_article_read(facets_cache, query, aggregate_facets)
+
 # PUBLIC ROUTES MUST COME BEFORE PARAMETERIZED ROUTES
+# Public catalogue: fields shown by the catalogue cards and detail modal
+PUBLIC_PROJECTION = {
+    '_id': 0,
+    'id': 1,
+    'type': 1,
+    'nom': 1,
+    'ref': 1,
+    'sku': 1,
+    'marque': 1,
+    'categorie': 1,
+    'sous_categorie': 1,
+    'etat': 1,
+    'description': 1,
+    'prix_neuf': 1,
+    'prix_vente': 1,
+    'quantite': 1,
+    'litres': 1,
+    'photos': {'$slice': 1}
+}
+PUBLIC_PAGE_MAX = 200
+
 @api_router.get("/articles/public")
-async def get_public_articles():
-    """Get public articles - with first photo for display (NO AUTH REQUIRED)"""
-    try:
-        print("=== PUBLIC ARTICLES ENDPOINT CALLED ===")
-        
-        # Récupérer tous les articles publics avec la première photo
-        all_articles = await db.articles.find(
-            {'public': True}, 
-            {'_id': 0}  # Load all fields including photos
-        ).sort('id', -1).to_list(1000)
-        
-        print(f"Found {len(all_articles)} public articles")
-        
-        # Filtrer ceux qui ont du stock (quantite > 0 pour pièces, litres > 0 pour liquides)
-        articles = [
-            a for a in all_articles 
-            if (a.get('type') == 'piece' and a.get('quantite', 0) > 0) or 
-               (a.get('type') == 'liquide' and a.get('litres', 0) > 0)
-        ]
-        
-        print(f"Filtered to {len(articles)} articles with stock")
+async def get_public_articles(
+    request: Request,
+    cursor: str = None,
+    limit: int = 100,
+    marque: str = None,
+    categorie: str = None,
+    type: str = None
+):
+    """Get public articles in stock - with first photo for display (NO AUTH REQUIRED)
+    
+    One page per request, sorted by id descending: the cursor of the next page is returned
+    in the X-Next-Cursor header (absent on the last page), the body stays a list of articles.
+    """
+    limit = max(1, min(limit, PUBLIC_PAGE_MAX))
+    # Public and in stock (see is_catalogue_visible): range scan on the catalogue_visible_id partial index
+    query = {'catalogue_visible': True}
+    if marque and marque != 'all':
+        # Any spelling of the brand, the names of /marques-public are normalized (brand_name)
+        query['marque_key'] = brand_key(marque)
+    if categorie and categorie != 'all':
+        query['categorie'] = categorie
+    if type and type != 'all':
+        query['type'] = type
+    if cursor:
+        query['id'] = {'$lt': decode_cursor(cursor)}
+    
+    async def build():
+        try:
+            articles = await db.articles.find(query, PUBLIC_PROJECTION).sort('id', -1).limit(limit).to_list(limit)
+        except Exception as e:
+            logger.error(f"Error fetching public articles: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
         
-        # Keep only first photo to reduce payload
         for article in articles:
-            if article.get('photos') and len(article['photos']) > 0:
-                article['photos'] = [article['photos'][0]]  # Keep only first photo
-            else:
-                article['photos'] = []
-        
-        print(f"Returning {len(articles)} articles")
-        return articles
-    except Exception as e:
-        print(f"!!! ERROR in public articles: {e}")
-        logger.error(f"Error fetching public articles: {e}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+            article.setdefault('photos', [])
+        headers = {'X-Next-Cursor': encode_cursor(articles[-1]['id'])} if len(articles) == limit else None
+        return JSONResponse(content=jsonable_encoder(articles), headers=headers)
+    
+    key = 'articles/public?' + json.dumps([cursor, limit, marque, categorie, type])
+    return await cached_response(request, key, ('articles',), build, CACHE_CONTROL_CATALOGUE)
 
 @api_router.get("/articles/public/{article_id}")
-async def get_public_article(article_id: int):
+async def get_public_article(request: Request, article_id: int):
     """Get full public article details including photos"""
-    article = await db.articles.find_one({'id': article_id, 'public': True}, {'_id': 0})
-    if not article:
-        raise HTTPException(status_code=404, detail='Article not found')
-    return article
+    async def build():
+        article = await db.articles.find_one({'id': article_id, 'public': True}, ARTICLE_DETAIL_PROJECTION)
+        if not article:
+            raise HTTPException(status_code=404, detail='Article not found')
+        return article
+    
+    return await cached_response(
+        request, f'articles/public/{article_id}', (f'articles:{article_id}',), build, CACHE_CONTROL_CATALOGUE
+    )
 
 # PROTECTED ROUTES (require authentication)
+@api_router.get("/articles/generate-sku")
+async def get_new_sku(user_data: dict = Depends(verify_token)):
+    """SKU preview for the article form, the one actually stored is drawn at insert (insert_article_with_sku)"""
+    return {'sku': generate_sku()}
+
 @api_router.get("/articles/{article_id}")
-async def get_article(article_id: int, user_data: dict = Depends(verify_token)):
+async def get_article(request: Request, article_id: int, user_data: dict = Depends(verify_token)):
     """Get full article details by ID (authenticated)"""
-    article = await db.articles.find_one({'id': article_id}, {'_id': 0})
-    if not article:
-        raise HTTPException(status_code=404, detail='Article not found')
-    return article
+    async def build():
+        article = await db.articles.find_one({'id': article_id}, ARTICLE_DETAIL_PROJECTION)
+        if not article:
+            raise HTTPException(status_code=404, detail='Article not found')
+        return article
+    
+    return await cached_response(
+        request, f'articles/{article_id}', (f'articles:{article_id}',), build, CACHE_CONTROL_PRIVATE
+    )
 
 @api_router.post("/articles")
 async def create_article(article: ArticleCreate, user_data: dict = Depends(verify_token)):
-    # Get next ID (index on id should handle this efficiently)
-    last_article = await db.articles.find_one({}, {'_id': 0, 'id': 1}, sort=[('id', -1)])
-    next_id = (last_article['id'] + 1) if last_article else 1
+    await check_photo_refs(article.photos)
     
-    # Check if SKU already exists, generate new one if needed
-    sku = generate_sku()
-    while await db.articles.find_one({'sku': sku}):
-        sku = generate_sku()
+    # Next ID from the articles sequence (atomic, usually no round trip, see IdBlockAllocator)
+    next_id = await article_ids.next_id()
     
-    # Compress photos
-    compressed_photos = [compress_image(photo) for photo in article.photos]
+    # Compress photos into the photo store
+    stored_photos, acquired_photos = await store_article_photos(article.photos)
     
     article_data = article.model_dump()
     article_data['id'] = next_id
-    article_data['sku'] = sku
-    article_data['photos'] = compressed_photos
+    article_data['photos'] = stored_photos
     article_data['posted_by'] = user_data['username']
     article_data['date_post'] = datetime.now(timezone.utc).isoformat()
     
-    await db.articles.insert_one(article_data)
+    try:
+        sku = await insert_article_with_sku(article_data)
+    except HTTPException:
+        await sync_photo_refs([], [], acquired_photos)
+        raise
+    next_id = article_data['id']
+    bump_article_versions([next_id])
+    await sync_article_vocab(None, article_data)
+    await sync_article_brands(None, article_data)
+    await sync_photo_refs([], stored_photos, acquired_photos)
     
     # Broadcast notification
     await broadcast_notification({
@@ -707,9 +1688,9 @@ async def update_article(article_id: int, article: ArticleCreate, user_data: dic
     # If photos is not in article_data, it means it wasn't sent, so preserve existing
     if 'photos' in article_data:
         if article_data['photos'] and len(article_data['photos']) > 0:
-            # Compress new photos
-            compressed_photos = [compress_image(photo) for photo in article_data['photos']]
-            article_data['photos'] = compressed_photos
+            await check_photo_refs([photo for photo in article_data['photos'] if photo not in existing.get('photos', [])])
+            # Compress new photos into the photo store
+            article_data['photos'], acquired_photos = await store_article_photos(article_data['photos'])
         else:
             # Empty array was sent - this means user wants to remove photos
             # But we'll preserve existing photos unless explicitly empty
@@ -723,8 +1704,16 @@ async def update_article(article_id: int, article: ArticleCreate, user_data: dic
     # Preserve metadata that shouldn't change
     article_data['posted_by'] = existing.get('posted_by')
     article_data['date_post'] = existing.get('date_post')
+    article_data.update(article_derived_fields({**existing, **article_data}))
     
     await db.articles.update_one({'id': article_id}, {'$set': article_data})
+    bump_article_versions([article_id])
+    await sync_article_vocab(existing, {**existing, **article_data})
+    await sync_article_brands(existing, {**existing, **article_data})
+    
+    # Count the new photos and free the ones removed from the article
+    if 'photos' in article_data:
+        await sync_photo_refs(existing.get('photos', []), article_data['photos'], acquired_photos)
     
     await broadcast_notification({
         'type': 'article_updated',
@@ -735,19 +1724,20 @@ async def update_article(article_id: int, article: ArticleCreate, user_data: dic
 
 @api_router.delete("/articles/{article_id}")
 async def delete_article(article_id: int, user_data: dict = Depends(verify_token)):
-    await db.articles.delete_one({'id': article_id})
+    article = await db.articles.find_one_and_delete(
+        {'id': article_id},
+        {'_id': 0, 'photos': 1, 'categorie': 1, 'sous_categorie': 1, 'marque': 1, 'public': 1}
+    )
+    if article:
+        bump_article_versions([article_id])
+        await sync_article_vocab(article, None)
+        await sync_article_brands(article, None)
+        await sync_photo_refs(article.get('photos', []), [])
     return {'message': 'Article deleted successfully'}
 
-@api_router.get("/articles/generate-sku")
-async def get_new_sku(user_data: dict = Depends(verify_token)):
-    sku = generate_sku()
-    while await db.articles.find_one({'sku': sku}):
-        sku = generate_sku()
-    return {'sku': sku}
-
 @api_router.post("/articles/export")
 async def export_articles(user_data: dict = Depends(verify_token)):
-    articles = await db.articles.find({}, {'_id': 0}).to_list(10000)
+    articles = await db.articles.find({}, ARTICLE_DETAIL_PROJECTION).to_list(10000)
     
     wb = Workbook()
     ws = wb.active
@@ -803,6 +1793,233 @@ async def export_articles(user_data: dict = Depends(verify_token)):
     
     return FileResponse(temp_path, filename='inventaire_bms.xlsx', media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
+# Bulk import
+IMPORT_BATCH = 1000
+IMPORT_MAX_REPORTED_ERRORS = 1000
+IMPORT_FORMATS = {'.csv': 'csv', '.xlsx': 'xlsx', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+def import_header_key(header: Any) -> str:
+    """'Sous-catégorie' / 'sous_categorie' -> 'sous categorie'"""
+    return ' '.join(fold_text(str(header or '')).replace('_', ' ').replace('-', ' ').split())
+
+# Accepted columns: the ArticleCreate fields and the headers of the Excel export (ID, SKU... are assigned here)
+IMPORT_COLUMNS = {import_header_key(field): field for field in ArticleCreate.model_fields}
+IMPORT_COLUMNS['reference'] = 'ref'
+IMPORT_NUMBER_FIELDS = {'prix_neuf', 'prix_achat', 'prix_vente', 'quantite', 'litres', 'quantite_min', 'usage_hebdo'}
+IMPORT_BOOLEANS = {'oui': True, 'non': False, 'true': True, 'false': False, 'yes': True, 'no': False, '1': True, '0': False}
+
+def import_row_data(raw: dict) -> dict:
+    """Cells of a row to ArticleCreate input, empty cells take the model defaults"""
+    data = {}
+    for header, value in raw.items():
+        field = IMPORT_COLUMNS.get(import_header_key(header))
+        if field is None or value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+            if field == 'public':
+                value = IMPORT_BOOLEANS.get(value.casefold(), value)
+            elif field in IMPORT_NUMBER_FIELDS:
+                # French spreadsheets: '1 234,50'
+                value = value.replace('\u00a0', '').replace(' ', '').replace(',', '.')
+            elif field == 'photos':
+                value = [photo.strip() for photo in value.split(',') if photo.strip()]
+        elif isinstance(value, datetime):
+            value = value.date().isoformat()
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and field not in IMPORT_NUMBER_FIELDS:
+            # Numeric cells in text columns (references...)
+            value = str(int(value)) if float(value).is_integer() else str(value)
+        data[field] = value
+    return data
+
+class ImportRowError(str):
+    """Stands for the cells of a row that could not be read, holds the error message"""
+
+def iter_import_rows(file: UploadFile, file_format: str) -> Iterator[Tuple[int, Any]]:
+    """(row number, cells by header) of the upload, streamed; an ImportRowError instead of the cells when unreadable"""
+    if file_format == 'xlsx':
+        workbook = load_workbook(file.file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = next(rows, None) or ()
+            for number, values in enumerate(rows, start=2):
+                if any(value not in (None, '') for value in values):
+                    yield number, dict(zip(headers, values))
+        finally:
+            workbook.close()
+    elif file_format == 'csv':
+        text = io.TextIOWrapper(file.file, encoding='utf-8-sig', newline='')
+        # Excel in French writes ';' separated files
+        first_line = text.readline()
+        delimiter = ';' if first_line.count(';') > first_line.count(',') else ','
+        reader = csv.DictReader(itertools.chain([first_line], text), delimiter=delimiter)
+        for cells in reader:
+            if any(cells.values()):
+                yield reader.line_num, cells
+    else:
+        text = io.TextIOWrapper(file.file, encoding='utf-8-sig')
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, ImportRowError(f'Invalid JSON: {e}')
+                continue
+            yield number, row if isinstance(row, dict) else ImportRowError('A JSON object is expected')
+
+def read_import_batch(rows: Iterator[Tuple[int, Any]], size: int) -> Tuple[List[Tuple[int, dict]], List[dict], bool]:
+    """Parse and validate the next rows: (valid articles, row errors, end of file)"""
+    valid, errors = [], []
+    count = 0
+    for number, raw in itertools.islice(rows, size):
+        count += 1
+        if isinstance(raw, ImportRowError):
+            errors.append({'row': number, 'errors': [str(raw)]})
+            continue
+        try:
+            article = ArticleCreate.model_validate(import_row_data(raw)).model_dump()
+        except ValidationError as e:
+            errors.append({'row': number, 'errors': [
+                f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+            ]})
+            continue
+        if any(not photo_id_from_ref(photo) for photo in article['photos']):
+            errors.append({'row': number, 'errors': ['photos: photo store references expected (upload with POST /photos)']})
+            continue
+        valid.append((number, article))
+    return valid, errors, count < size
+
+async def check_import_photos(valid: List[Tuple[int, dict]]) -> Tuple[List[Tuple[int, dict]], List[dict]]:
+    """Set aside the rows referencing photos missing from the store (one query per batch)"""
+    photo_ids = {photo_id for _, article in valid for photo_id in map(photo_id_from_ref, article['photos'])}
+    if not photo_ids:
+        return valid, []
+    found = await stored_photo_ids(photo_ids)
+    
+    checked, errors = [], []
+    for number, article in valid:
+        missing = [photo for photo in article['photos'] if photo_id_from_ref(photo) not in found]
+        if missing:
+            errors.append({'row': number, 'errors': [f'photos: not in the photo store: {photo}' for photo in missing]})
+        else:
+            checked.append((number, article))
+    return checked, errors
+
+async def insert_import_batch(valid: List[Tuple[int, dict]], username: str) -> Tuple[List[dict], List[dict]]:
+    """Insert a batch with one unordered bulk_write, rows whose random SKU is taken are retried with another one"""
+    first_id = await allocate_ids('articles', len(valid))
+    date_post = datetime.now(timezone.utc).isoformat()
+    pending = [
+        (number, {**article, 'id': first_id + offset, 'posted_by': username, 'date_post': date_post})
+        for offset, (number, article) in enumerate(valid)
+    ]
+    inserted, errors = [], []
+    for _ in range(SKU_ATTEMPTS):
+        for _, article in pending:
+            article.pop('_id', None)
+            article['sku'] = generate_sku()
+            article.update(article_derived_fields(article))
+        try:
+            await db.articles.bulk_write([InsertOne(article) for _, article in pending], ordered=False)
+            failed = {}
+        except BulkWriteError as e:
+            failed = {error['index']: error for error in e.details.get('writeErrors', [])}
+        
+        retry = []
+        for index, (number, article) in enumerate(pending):
+            error = failed.get(index)
+            if error is None:
+                inserted.append(article)
+            elif error.get('code') == 11000 and 'sku' in (error.get('keyPattern') or {}):
+                retry.append((number, article))
+            else:
+                errors.append({'row': number, 'errors': [error.get('errmsg', 'Write error')]})
+        pending = retry
+        if not pending:
+            break
+    errors.extend({'row': number, 'errors': ['Could not allocate a SKU']} for number, _ in pending)
+    return inserted, errors
+
+async def sync_imported_articles(articles: List[dict]):
+    """Vocabulary, brands and photo counts of freshly inserted articles, one write per collection"""
+    vocab = Counter()
+    brands = Counter()
+    noms: Dict[str, str] = {}
+    photos = Counter()
+    for article in articles:
+        vocab.update(article_vocab_pairs(article))
+        brands.update(article_brand_counts(article))
+        nom = brand_name(article.get('marque'))
+        if nom:
+            noms.setdefault(brand_key(nom), nom)
+        # One reference per article using the photo, however many times it lists it
+        photos.update({photo_id_from_ref(photo) for photo in article['photos']})
+    await apply_vocab_delta(vocab)
+    await apply_brand_delta(brands, noms)
+    if photos:
+        await db.photos.bulk_write(
+            [UpdateOne({'id': photo_id}, {'$inc': {'refs': count}}) for photo_id, count in photos.items()],
+            ordered=False
+        )
+
+@api_router.post("/articles/import")
+async def import_articles(file: UploadFile = File(...), user_data: dict = Depends(verify_token)):
+    """Create articles from a CSV, XLSX or NDJSON file (Admin only)
+    
+    Columns are the ArticleCreate fields or the headers of the Excel export. The file is read
+    and validated IMPORT_BATCH rows at a time in a thread, each batch is inserted with a single
+    bulk_write. Invalid rows are skipped and reported with their row number.
+    """
+    if user_data['role'] != 'admin':
+        raise HTTPException(status_code=403, detail='Admin only')
+    
+    file_format = IMPORT_FORMATS.get(Path(file.filename or '').suffix.lower())
+    if not file_format:
+        raise HTTPException(status_code=400, detail='Unsupported file: .csv, .xlsx or .ndjson expected')
+    
+    rows = iter_import_rows(file, file_format)
+    imported = 0
+    errors = []
+    error_rows = 0
+    done = False
+    while not done:
+        try:
+            valid, row_errors, done = await asyncio.to_thread(read_import_batch, rows, IMPORT_BATCH)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail=f'The file must be UTF-8 encoded ({imported} articles imported)')
+        except Exception as e:
+            logger.warning(f"Import: unreadable {file_format} file: {e}")
+            raise HTTPException(status_code=400, detail=f'Unreadable {file_format} file ({imported} articles imported)')
+        
+        valid, photo_errors = await check_import_photos(valid)
+        row_errors.extend(photo_errors)
+        if valid:
+            inserted, write_errors = await insert_import_batch(valid, user_data['username'])
+            row_errors.extend(write_errors)
+            if inserted:
+                imported += len(inserted)
+                bump_version('articles')
+                await sync_imported_articles(inserted)
+        
+        error_rows += len(row_errors)
+        errors.extend(row_errors[:IMPORT_MAX_REPORTED_ERRORS - len(errors)])
+    
+    if imported:
+        await broadcast_notification({
+            'type': 'articles_imported',
+            'data': {'count': imported, 'by': user_data['username']}
+        })
+    
+    return {
+        'imported': imported,
+        'error_rows': error_rows,
+        # First IMPORT_MAX_REPORTED_ERRORS rows in error, in file order
+        'errors': sorted(errors, key=lambda error: error['row'])
+    }
+
 # Update liquid quantity
 @api_router.post("/articles/{article_id}/quantity")
 async def update_quantity(article_id: int, data: dict, user_data: dict = Depends(verify_token)):
@@ -814,7 +2031,11 @@ async def update_quantity(article_id: int, data: dict, user_data: dict = Depends
     if new_litres < 0:
         new_litres = 0
     
-    await db.articles.update_one({'id': article_id}, {'$set': {'litres': new_litres}})
+    await db.articles.update_one({'id': article_id}, {'$set': {
+        'litres': new_litres,
+        'catalogue_visible': is_catalogue_visible({**article, 'litres': new_litres})
+    }})
+    bump_article_versions([article_id])
     return {'message': 'Quantity updated', 'new_litres': new_litres}
 
 # Post-its
@@ -827,7 +2048,9 @@ async def get_postits(user_data: dict = Depends(verify_token)):
 @api_router.post("/postits")
 async def create_postit(postit: PostItCreate, user_data: dict = Depends(verify_token)):
     # Compress photo if exists
-    compressed_photo = compress_image(postit.photo) if postit.photo else None
+    # A photo store reference (from POST /photos) is kept as-is
+    await check_photo_refs([postit.photo])
+    compressed_photo = await compress_image_async(postit.photo) if postit.photo else None
     
     postit_data = {
         'id': str(uuid.uuid4()),
@@ -840,6 +2063,7 @@ async def create_postit(postit: PostItCreate, user_data: dict = Depends(verify_t
     }
     
     await db.postits.insert_one(postit_data)
+    await sync_photo_refs([], [compressed_photo])
     
     await broadcast_notification({
         'type': 'postit_created',
@@ -877,6 +2101,7 @@ async def delete_postit(postit_id: str, user_data: dict = Depends(verify_token))
         raise HTTPException(status_code=403, detail='Unauthorized')
     
     await db.postits.delete_one({'id': postit_id})
+    await sync_photo_refs([postit.get('photo')], [])
     
     await broadcast_notification({
         'type': 'postit_deleted',
@@ -918,7 +2143,10 @@ async def delete_agenda_event(event_id: str, user_data: dict = Depends(verify_to
 
 # Pubs/Offres (admin only)
 @api_router.get("/pubs")
-async def get_pubs():
+async def get_pubs(request: Request):
+    return await cached_response(request, 'pubs', ('pubs',), load_pubs, CACHE_CONTROL_PUBS, ttl=PUBS_CACHE_TTL)
+
+async def load_pubs() -> list:
     now = datetime.now(timezone.utc).isoformat()
     pubs = await db.pubs.find({'duree_fin': {'$gte': now}}, {'_id': 0}).to_list(1000)
     return pubs
@@ -928,7 +2156,9 @@ async def create_pub(pub: PubCreate, user_data: dict = Depends(verify_token)):
     if user_data['role'] != 'admin':
         raise HTTPException(status_code=403, detail='Admin only')
     
-    compressed_image = compress_image(pub.image) if pub.image else None
+    # A photo store reference (from POST /photos) is kept as-is
+    await check_photo_refs([pub.image])
+    compressed_image = await compress_image_async(pub.image) if pub.image else None
     
     now = datetime.now(timezone.utc)
     end_date = now + timedelta(days=pub.duree_jours)
@@ -944,6 +2174,9 @@ async def create_pub(pub: PubCreate, user_data: dict = Depends(verify_token)):
     }
     
     await db.pubs.insert_one(pub_data)
+    pub_data.pop('_id', None)
+    await sync_photo_refs([], [compressed_image])
+    bump_version('pubs')
     return pub_data
 
 @api_router.delete("/pubs/{pub_id}")
@@ -951,12 +2184,18 @@ async def delete_pub(pub_id: str, user_data: dict = Depends(verify_token)):
     if user_data['role'] != 'admin':
         raise HTTPException(status_code=403, detail='Admin only')
     
-    await db.pubs.delete_one({'id': pub_id})
+    pub = await db.pubs.find_one_and_delete({'id': pub_id}, {'_id': 0, 'image': 1})
+    if pub:
+        await sync_photo_refs([pub.get('image')], [])
+    bump_version('pubs')
     return {'message': 'Pub deleted'}
 
 # Settings (admin only)
 @api_router.get("/settings")
-async def get_settings():
+async def get_settings(request: Request):
+    return await cached_response(request, 'settings', ('settings',), load_settings, CACHE_CONTROL_SETTINGS)
+
+async def load_settings() -> dict:
     settings = await db.settings.find_one({}, {'_id': 0})
     if not settings:
         return {'tel_commande': None, 'tel_pub': None, 'theme_color': 'blue', 'deal_email': None}
@@ -972,6 +2211,7 @@ async def update_settings(settings: Settings, user_data: dict = Depends(verify_t
         raise HTTPException(status_code=403, detail='Admin only')
     
     await db.settings.update_one({}, {'$set': settings.model_dump()}, upsert=True)
+    bump_version('settings')
     return {'message': 'Settings updated'}
 
 # Deals (DealBurner role creates; admin/employee read)
@@ -1025,7 +2265,8 @@ async def create_deal(deal: DealCreate, user_data: dict = Depends(verify_token))
     # Only role 'dealburner' can create
     if user_data['role'] != 'dealburner':
         raise HTTPException(status_code=403, detail='DealBurner only')
-    compressed_image = compress_image(deal.image) if deal.image else None
+    await check_photo_refs([deal.image])
+    compressed_image = await compress_image_async(deal.image) if deal.image else None
     deal_id = str(uuid.uuid4())
     deal_data = {
         'id': deal_id,
@@ -1040,6 +2281,7 @@ async def create_deal(deal: DealCreate, user_data: dict = Depends(verify_token))
         'date': datetime.now(timezone.utc).isoformat()
     }
     await db.deals.insert_one(deal_data)
+    await sync_photo_refs([], [compressed_image])
     # find notification email from settings
     settings = await db.settings.find_one({}, {'_id': 0})
     notify_to = settings.get('deal_email') if settings else None
@@ -1079,6 +2321,7 @@ async def delete_deal(deal_id: str, user_data: dict = Depends(verify_token)):
     if user_data['role'] not in ['admin', 'employee'] and deal.get('posted_by') != user_data['username']:
         raise HTTPException(status_code=403, detail='Unauthorized')
     await db.deals.delete_one({'id': deal_id})
+    await sync_photo_refs([deal.get('image')], [])
     return {'message': 'Deal deleted'}
 
 @api_router.put("/deals/{deal_id}/availability")
@@ -1125,61 +2368,113 @@ async def update_todos(data: dict, user_data: dict = Depends(verify_token)):
 
 # Categories
 @api_router.get("/categories")
-async def get_categories():
-    # Use projection to only load category fields, not all article data
-    articles = await db.articles.find({}, {'_id': 0, 'categorie': 1, 'sous_categorie': 1}).allow_disk_use(True).to_list(10000)
+async def get_categories(request: Request):
+    """Categories and sub-categories in use, read from the vocabulary collection (see sync_article_vocab)"""
+    return await cached_response(request, 'categories', ('vocabulary',), load_categories, CACHE_CONTROL_VOCABULARY)
+
+async def load_categories() -> dict:
+    entries = await db.vocabulary.find({'count': {'$gt': 0}}, {'_id': 0}).to_list(None)
     
     categories = set()
     sous_categories = set()
+    hierarchy: Dict[str, Dict[str, int]] = {}
     
-    for article in articles:
-        if article.get('categorie'):
-            categories.add(article['categorie'])
-        if article.get('sous_categorie'):
-            sous_categories.add(article['sous_categorie'])
+    for entry in entries:
+        if entry['categorie']:
+            categories.add(entry['categorie'])
+        if entry['sous_categorie']:
+            sous_categories.add(entry['sous_categorie'])
+        children = hierarchy.setdefault(entry['categorie'], {})
+        if entry['sous_categorie']:
+            children[entry['sous_categorie']] = entry['count']
     
     return {
-        'categories': sorted(list(categories)),
-        'sous_categories': sorted(list(sous_categories))
+        'categories': sorted(categories),
+        'sous_categories': sorted(sous_categories),
+        # categorie -> {sous_categorie: article count}, '' for sub-categories without category
+        'hierarchy': {categorie: dict(sorted(children.items())) for categorie, children in sorted(hierarchy.items())}
     }
 
 # Marques
 @api_router.get("/marques")
-async def get_marques(user_data: dict = Depends(verify_token)):
-    """Get unique marques from articles - optimized with projection"""
-    # Only load marque field, not all article data
-    articles = await db.articles.find(
-        {'marque': {'$exists': True, '$ne': None, '$ne': ''}},
-        {'_id': 0, 'marque': 1}
-    ).allow_disk_use(True).to_list(10000)
-    
-    marques = set()
-    for article in articles:
-        marque = article.get('marque')
-        if marque and marque.strip():
-            marques.add(marque.strip())
-    
-    return sorted(list(marques))
+async def get_marques(prefix: str = None, limit: int = None, user_data: dict = Depends(verify_token)):
+    """Brands used by the articles, sorted by name; with ?prefix= the most used ones starting with it (typeahead)"""
+    return await lookup_brands(prefix, limit, 'count')
 
 @api_router.get("/marques-public")
-async def get_marques_public():
-    """Get unique marques from public articles - no auth required"""
+async def get_marques_public(request: Request, prefix: str = None, limit: int = None):
+    """Brands used by public articles - no auth required"""
     try:
-        articles = await db.articles.find(
-            {'public': True, 'marque': {'$exists': True, '$ne': None, '$ne': ''}},
-            {'_id': 0, 'marque': 1}
-        ).to_list(10000)
+        return await cached_response(
+            request,
+            'marques-public?' + json.dumps([prefix, limit]),
+            ('brands',),
+            lambda: lookup_brands(prefix, limit, 'public_count'),
+            CACHE_CONTROL_VOCABULARY
+        )
     except Exception as e:
         logger.warning(f"Error fetching marques-public: {e}")
         return []
-    
-    marques = set()
-    for article in articles:
-        marque = article.get('marque')
-        if marque and marque.strip():
-            marques.add(marque.strip())
-    
-    return sorted(list(marques))
+
+# Photo store
+@api_router.post("/photos")
+async def upload_photo(file: UploadFile = File(...), user_data: dict = Depends(verify_token)):
+    """Multipart photo upload, returns a reference for article photos, post-it photo or deal image
+    
+    The upload is spooled to a temporary file by Starlette and hashed chunk by chunk,
+    so memory stays bounded by MAX_PHOTO_UPLOAD_BYTES whatever the JSON payloads look like.
+    """
+    source = hashlib.sha256()
+    size = 0
+    while chunk := await file.read(PHOTO_UPLOAD_CHUNK):
+        size += len(chunk)
+        if size > MAX_PHOTO_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail='Photo too large')
+        source.update(chunk)
+    if not size:
+        raise HTTPException(status_code=400, detail='Empty file')
+    source_hash = source.hexdigest()
+    
+    # Known upload: nothing to decode or store. Looked up with a write: a photo deleted
+    # since is stored again below, and the grace period of rebuild_photo_refs restarts.
+    known = await db.photos.find_one_and_update(
+        {'sources': source_hash},
+        {'$max': {'created_at': datetime.now(timezone.utc).isoformat()}},
+        projection={'_id': 0, 'id': 1}
+    )
+    if known:
+        return {'id': known['id'], 'url': photo_ref(known['id'])}
+    
+    await file.seek(0)
+    variants = (await run_image_jobs(make_derivatives, [(await file.read(),)]))[0]
+    if variants is None:
+        raise HTTPException(status_code=400, detail='Invalid image')
+    
+    # Not counted yet: the article/post-it/deal referencing it acquires it
+    photo_id = await store_photo(variants, source_hash, acquire=False)
+    return {'id': photo_id, 'url': photo_ref(photo_id)}
+
+@api_router.get("/photos/{photo_id}")
+async def get_photo(photo_id: str, size: str = 'full'):
+    """Serve a stored photo at one of the PHOTO_SIZES (NO AUTH REQUIRED, photos are referenced by public articles)"""
+    if size not in PHOTO_SIZES:
+        raise HTTPException(status_code=400, detail=f"Invalid size, expected one of: {', '.join(PHOTO_SIZES)}")
+    
+    field = 'data' if size == 'full' else size
+    photo = await db.photos.find_one({'id': photo_id}, {'_id': 0, field: 1, 'content_type': 1})
+    if not photo:
+        raise HTTPException(status_code=404, detail='Photo not found')
+    if field not in photo:
+        # Stored before the sizes were generated: fall back to the full size
+        photo = await db.photos.find_one({'id': photo_id}, {'_id': 0, 'data': 1, 'content_type': 1})
+        field = 'data'
+    
+    # Photo ids are never reused, the bytes can be cached forever
+    return Response(
+        content=bytes(photo[field]),
+        media_type=photo.get('content_type', 'image/jpeg'),
+        headers={'Cache-Control': PHOTO_CACHE_CONTROL, 'ETag': f'"{photo_id}-{size}"'}
+    )
 
 # Stats tracking
 @api_router.post("/articles/{article_id}/view")
@@ -1199,7 +2494,7 @@ async def track_article_view(article_id: int):
 async def get_article_stats(user_data: dict = Depends(verify_token)):
     """Get view statistics for all articles"""
     stats = await db.article_stats.find({}, {'_id': 0}).to_list(10000)
-    articles = await db.articles.find({}, {'_id': 0, 'id': 1, 'nom': 1, 'ref': 1, 'photos': 1}).to_list(10000)
+    articles = await db.articles.find({}, {'_id': 0, 'id': 1, 'nom': 1, 'ref': 1, 'photos': {'$slice': 1}}).to_list(10000)
     
     # Create a map of article details
     article_map = {a['id']: a for a in articles}
@@ -1213,7 +2508,7 @@ async def get_article_stats(user_data: dict = Depends(verify_token)):
                 'article_id': article_id,
                 'nom': article_map[article_id].get('nom'),
                 'ref': article_map[article_id].get('ref'),
-                'photo': article_map[article_id].get('photos', [None])[0],
+                'photo': photo_variant_ref((article_map[article_id].get('photos') or [None])[0], 'thumb'),
                 'views': stat.get('views', 0),
                 'last_viewed': stat.get('last_viewed')
             })
@@ -1223,34 +2518,43 @@ async def get_article_stats(user_data: dict = Depends(verify_token)):
     return result
 
 # Commandes
+def commande_counter(year: int) -> str:
+    return f'commandes-{year}'
+
+async def seed_commande_counter(year: int):
+    """Move the sequence of the year past the orders numbered before the counter (CMD-<year>-<n>)"""
+    last_num = 0
+    async for existing in db.commandes.find({'numero': {'$regex': f'^CMD-{year}-'}}, {'_id': 0, 'numero': 1}):
+        suffix = existing['numero'].rsplit('-', 1)[-1]
+        if suffix.isdigit():
+            last_num = max(last_num, int(suffix))
+    if last_num:
+        await db.counters.update_one({'_id': commande_counter(year)}, {'$max': {'seq': last_num}}, upsert=True)
+
 @api_router.post("/commandes")
 async def create_commande(commande: CommandeCreate):
     """Créer une nouvelle commande depuis le catalogue public"""
-    # Générer un numéro unique
-    year = datetime.now(timezone.utc).year
-    # Index on numero should handle sorting efficiently
-    last_commande = await db.commandes.find_one(
-        {'numero': {'$regex': f'^CMD-{year}-'}},
-        sort=[('numero', -1)]
-    )
-    if last_commande:
-        last_num = int(last_commande['numero'].split('-')[-1])
-        next_num = last_num + 1
-    else:
-        next_num = 1
-    numero = f'CMD-{year}-{next_num:04d}'
-    
+    date = datetime.now(timezone.utc)
     commande_id = str(uuid.uuid4())
     commande_data = {
         'id': commande_id,
-        'numero': numero,
         'items': [item.model_dump() for item in commande.items],
         'total': commande.total,
-        'date': datetime.now(timezone.utc).isoformat(),
+        'date': date.isoformat(),
         'statut': 'en_attente'
     }
     
-    await db.commandes.insert_one(commande_data)
+    # Numéro unique : séquence atomique de l'année (collection counters), l'index unique sur numero en filet de sécurité
+    for _ in range(COMMANDE_NUMERO_ATTEMPTS):
+        numero = f'CMD-{date.year}-{await allocate_ids(commande_counter(date.year)):04d}'
+        try:
+            await db.commandes.insert_one({**commande_data, 'numero': numero})
+            break
+        except DuplicateKeyError:
+            # Numbers written without the counter (restored backup...): move it past them and retry
+            await seed_commande_counter(date.year)
+    else:
+        raise HTTPException(status_code=503, detail='Could not allocate an order number, please retry')
     
     # Notifier les admins via WebSocket
     await broadcast_notification({
@@ -1328,7 +2632,12 @@ async def create_backup(user_data: dict = Depends(verify_token)):
             'pubs': await db.pubs.find({}, {'_id': 0}).to_list(10000),
             'article_stats': await db.article_stats.find({}, {'_id': 0}).to_list(100000),
             'memos': await db.memos.find({}, {'_id': 0}).to_list(1000),
-            'todos': await db.todos.find({}, {'_id': 0}).to_list(1000)
+            'todos': await db.todos.find({}, {'_id': 0}).to_list(1000),
+            # Full size only (base64), the smaller sizes are rebuilt by `python migrate.py photo-sizes`
+            'photos': [
+                {**photo, 'data': base64.b64encode(photo['data']).decode()}
+                async for photo in db.photos.find({}, {'_id': 0, **{size: 0 for size in PHOTO_SIZES if size != 'full'}})
+            ]
         }
         
         # Convertir en JSON
@@ -1349,64 +2658,184 @@ async def create_backup(user_data: dict = Depends(verify_token)):
         logger.error(f"Error creating backup: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur lors de la création de la sauvegarde: {str(e)}")
 
-@api_router.post("/articles/fix-images")
-async def fix_all_images(user_data: dict = Depends(verify_token)):
-    """Re-process all article images to fix EXIF orientation (Admin only)"""
-    if user_data['role'] != 'admin':
-        raise HTTPException(status_code=403, detail='Admin only')
+# Fix images job: moves inline photos into the photo store (re-encoded, EXIF orientation fixed)
+# in the background, batch by batch. Processed articles are marked with photos_version so re-runs
+# skip them, and the job checkpoint (last article id) lets it resume after a crash or restart.
+PHOTO_PIPELINE_VERSION = 1
+FIX_IMAGES_JOB = 'fix-images'
+FIX_IMAGES_BATCH = 100
+fix_images_task: Optional[asyncio.Task] = None
+
+def fix_images_query() -> dict:
+    return {'photos.0': {'$exists': True}, 'photos_version': {'$ne': PHOTO_PIPELINE_VERSION}}
+
+async def start_fix_images_job() -> dict:
+    """Create the job document, or resume the unfinished one"""
+    now = datetime.now(timezone.utc).isoformat()
+    job = await db.jobs.find_one({'id': FIX_IMAGES_JOB}, {'_id': 0})
+    if not job or job.get('status') == 'done':
+        job = {
+            'id': FIX_IMAGES_JOB,
+            'status': 'running',
+            'last_id': None,
+            'total': await db.articles.count_documents(fix_images_query()),
+            'processed': 0,
+            'images_processed': 0,
+            'errors': 0,
+            'failed_ids': [],
+            'started_at': now,
+            'updated_at': now
+        }
+        await db.jobs.replace_one({'id': FIX_IMAGES_JOB}, job, upsert=True)
+    else:
+        job['status'] = 'running'
+        await db.jobs.update_one({'id': FIX_IMAGES_JOB}, {'$set': {'status': 'running', 'updated_at': now}})
+    return job
+
+async def fix_article_photos(article: dict) -> Tuple[List[str], List[str]]:
+    """store_article_photos that waits for room in the image pool instead of failing with 503"""
+    while True:
+        try:
+            return await store_article_photos(article['photos'])
+        except HTTPException as e:
+            if e.status_code != 503:
+                raise
+            await asyncio.sleep(1)
+
+async def fix_images_batch(articles: List[dict]) -> dict:
+    """Process one batch of articles and write it with a single bulk_write"""
+    results = []
+    failed_ids = []
+    # A few articles at a time so interactive uploads still get pool slots
+    for start in range(0, len(articles), IMAGE_WORKERS):
+        chunk = articles[start:start + IMAGE_WORKERS]
+        outcomes = await asyncio.gather(*(fix_article_photos(a) for a in chunk), return_exceptions=True)
+        for article, outcome in zip(chunk, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"fix-images: article {article['id']} failed: {outcome}")
+                failed_ids.append(article['id'])
+            else:
+                results.append((article, *outcome))
+    
+    if results:
+        # Only touch articles whose photos did not change while they were processed
+        await db.articles.bulk_write([
+            UpdateOne(
+                {'id': article['id'], 'photos': article['photos']},
+                {'$set': {'photos': stored, 'photos_version': PHOTO_PIPELINE_VERSION}}
+            )
+            for article, stored, _ in results
+        ], ordered=False)
+        bump_article_versions([article['id'] for article, _, _ in results])
+        current = {
+            a['id']: a.get('photos', [])
+            async for a in db.articles.find(
+                {'id': {'$in': [article['id'] for article, _, _ in results]}},
+                {'_id': 0, 'id': 1, 'photos': 1}
+            )
+        }
+        for article, stored, acquired in results:
+            if current.get(article['id']) == stored:
+                await sync_photo_refs(article['photos'], stored, acquired)
+            else:
+                # Edited meanwhile: give back what was acquired for the discarded version
+                await sync_photo_refs(stored, stored, acquired)
+    
+    # Unreadable photos are kept inline (and not retried), they still count as errors
+    unreadable = sum(1 for _, stored, _ in results for photo in stored if decode_data_url(photo))
+    return {
+        'last_id': articles[-1]['id'],
+        'processed': len(articles),
+        'images_processed': sum(len(article['photos']) for article, _, _ in results),
+        'errors': len(failed_ids) + unreadable,
+        'failed_ids': failed_ids
+    }
+
+async def run_fix_images_job(job: Optional[dict] = None):
+    """Stream the remaining articles through the batches, checkpointing after each one
     
+    job is the start_fix_images_job document when the caller already started it.
+    """
+    if job is None:
+        job = await start_fix_images_job()
     try:
-        articles = await db.articles.find({}, {'_id': 0}).to_list(10000)
-        updated_count = 0
-        error_count = 0
-        processed_count = 0
+        query = fix_images_query()
+        if job.get('last_id') is not None:
+            query['id'] = {'$gt': job['last_id']}
+        cursor = db.articles.find(query, {'_id': 0, 'id': 1, 'photos': 1}).sort('id', 1).batch_size(FIX_IMAGES_BATCH)
         
-        for article in articles:
-            if not article.get('photos') or len(article.get('photos', [])) == 0:
-                continue
-            
-            try:
-                # Re-process all photos
-                fixed_photos = []
-                for photo in article['photos']:
-                    if not photo or not isinstance(photo, str):
-                        fixed_photos.append(photo)
-                        continue
-                    
-                    try:
-                        fixed_photo = compress_image(photo)
-                        fixed_photos.append(fixed_photo)
-                    except Exception as e:
-                        print(f"Error processing photo for article {article.get('id')}: {e}")
-                        # Keep original photo if processing fails
-                        fixed_photos.append(photo)
-                        error_count += 1
-                
-                # Always update to ensure EXIF data is removed (even if image looks same)
-                # This ensures future displays won't have orientation issues
-                await db.articles.update_one(
-                    {'id': article['id']},
-                    {'$set': {'photos': fixed_photos}}
-                )
-                updated_count += 1
-                processed_count += len(article['photos'])
-            except Exception as e:
-                print(f"Error processing article {article.get('id')}: {e}")
-                error_count += 1
+        batch = []
+        async for article in cursor:
+            batch.append(article)
+            if len(batch) < FIX_IMAGES_BATCH:
                 continue
+            await checkpoint_fix_images(await fix_images_batch(batch))
+            batch = []
+        if batch:
+            await checkpoint_fix_images(await fix_images_batch(batch))
         
-        return {
-            'message': f'Images re-processed successfully',
-            'articles_updated': updated_count,
-            'total_articles': len(articles),
-            'images_processed': processed_count,
-            'errors': error_count
-        }
+        await db.jobs.update_one({'id': FIX_IMAGES_JOB}, {'$set': {
+            'status': 'done',
+            'finished_at': datetime.now(timezone.utc).isoformat()
+        }})
     except Exception as e:
-        import traceback
-        error_detail = traceback.format_exc()
-        print(f"Error in fix_all_images: {error_detail}")
-        raise HTTPException(status_code=500, detail=f'Error fixing images: {str(e)}')
+        logger.error(f"fix-images job failed: {e}")
+        await db.jobs.update_one({'id': FIX_IMAGES_JOB}, {'$set': {'status': 'failed', 'error': str(e)}})
+        raise
+    return await get_fix_images_status()
+
+async def checkpoint_fix_images(result: dict):
+    await db.jobs.update_one({'id': FIX_IMAGES_JOB}, {
+        '$set': {'last_id': result['last_id'], 'updated_at': datetime.now(timezone.utc).isoformat()},
+        '$inc': {
+            'processed': result['processed'],
+            'images_processed': result['images_processed'],
+            'errors': result['errors']
+        },
+        # Keep the last failures only
+        '$push': {'failed_ids': {'$each': result['failed_ids'], '$slice': -100}}
+    })
+
+async def launch_fix_images_job():
+    """Start the job document, then process the batches in the background"""
+    global fix_images_task
+    if fix_images_task is not None and not fix_images_task.done():
+        return
+    job = await start_fix_images_job()
+    # Another request may have launched it while the document was written
+    if fix_images_task is None or fix_images_task.done():
+        fix_images_task = asyncio.create_task(run_fix_images_job(job))
+
+async def get_fix_images_status() -> dict:
+    job = await db.jobs.find_one({'id': FIX_IMAGES_JOB}, {'_id': 0})
+    if not job:
+        return {'status': 'never_run'}
+    job['remaining'] = max(job.get('total', 0) - job.get('processed', 0), 0)
+    return job
+
+@api_router.post("/articles/fix-images", status_code=202)
+async def fix_all_images(user_data: dict = Depends(verify_token)):
+    """Start (or resume) re-processing all article images in the background (Admin only)"""
+    if user_data['role'] != 'admin':
+        raise HTTPException(status_code=403, detail='Admin only')
+    
+    await launch_fix_images_job()
+    return await get_fix_images_status()
+
+@api_router.get("/articles/fix-images/status")
+async def fix_images_status(user_data: dict = Depends(verify_token)):
+    """Progress of the fix images job: processed / remaining / errors (Admin only)"""
+    if user_data['role'] != 'admin':
+        raise HTTPException(status_code=403, detail='Admin only')
+    
+    return await get_fix_images_status()
+
+@api_router.get("/cache/stats")
+async def get_cache_stats(user_data: dict = Depends(verify_token)):
+    """Hit/miss counters of the public endpoints response cache (admin only)"""
+    if user_data['role'] != 'admin':
+        raise HTTPException(status_code=403, detail='Admin only')
+    return response_cache.stats()
 
 @api_router.get("/backup/info")
 async def get_backup_info(user_data: dict = Depends(verify_token)):
@@ -1469,6 +2898,8 @@ app.add_middleware(
     allow_origins=allowed_origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Public catalogue pagination (GET /articles/public)
+    expose_headers=["X-Next-Cursor"],
 )
 
 logging.basicConfig(
@@ -1480,3 +2911,5 @@ logger = logging.getLogger(__name__)
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    if image_pool is not None:
+        image_pool.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,26 @@
+import axios from "axios";
 import { clsx } from "clsx";
 import { twMerge } from "tailwind-merge"
 
 export function cn(...inputs) {
   return twMerge(clsx(inputs));
 }
+
+// Photo store references ('/api/photos/<id>') are served by the backend,
+// size picks a precomputed variant for list views: 'thumb' (96px), 'card' (320px) or 'full'
+export function photoSrc(photo, size) {
+  if (typeof photo === 'string' && photo.startsWith('/api/')) {
+    const sizeParam = size && !photo.includes('?') ? `?size=${size}` : '';
+    return `${process.env.REACT_APP_BACKEND_URL}${photo}${sizeParam}`;
+  }
+  return photo;
+}
+
+// Sends an image file to the photo store as multipart (no base64 in the JSON bodies),
+// resolves to the reference to put in the article photos, post-it photo, deal or pub image
+export async function uploadPhoto(file) {
+  const body = new FormData();
+  body.append('file', file);
+  const response = await axios.post(`${process.env.REACT_APP_BACKEND_URL}/api/photos`, body);
+  return response.data.url;
+}
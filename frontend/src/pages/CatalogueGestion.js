@@ -6,6 +6,7 @@ import { Input } from '../components/ui/input';
 import { toast } from 'sonner';
 import { Search, Plus, Minus, Eye, EyeOff, Edit, ShoppingCart, Trash2, AlertTriangle } from 'lucide-react';
 import { LazyLoadImage } from 'react-lazy-load-image-component';
+import { photoSrc } from '../lib/utils';
 import { Dialog, DialogContent, DialogHeader, DialogTitle } from '../components/ui/dialog';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
@@ -232,7 +233,7 @@ const CatalogueGestion = () => {
               >
                 {article.photos && article.photos.length > 0 ? (
                   <LazyLoadImage
-                    src={article.photos[0]}
+                    src={photoSrc(article.photos[0], 'card')}
                     alt={article.nom}
                     effect="blur"
                     className="w-full h-full object-cover"
@@ -389,7 +390,7 @@ const CatalogueGestion = () => {
                     {selectedArticle.photos.map((photo, idx) => (
                       <img
                         key={idx}
-                        src={photo}
+                        src={photoSrc(photo)}
                         alt={`${selectedArticle.nom} ${idx + 1}`}
                         className="w-full rounded-xl object-cover aspect-square"
                       />
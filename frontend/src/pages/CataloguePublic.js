@@ -10,6 +10,7 @@ import { Input } from '../components/ui/input';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../components/ui/select';
 import { Dialog, DialogContent, DialogHeader, DialogTitle } from '../components/ui/dialog';
 import { LazyLoadImage } from 'react-lazy-load-image-component';
+import { photoSrc } from '../lib/utils';
 import 'react-lazy-load-image-component/src/effects/blur.css';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
@@ -55,9 +56,17 @@ const CataloguePublic = () => {
 
   const fetchArticles = async () => {
     try {
-      const response = await axios.get(`${API}/articles/public`);
-      console.log('Public articles received:', response.data.length);
-      setArticles(Array.isArray(response.data) ? response.data : []);
+      // Le catalogue est paginé : suivre le curseur (en-tête X-Next-Cursor) jusqu'à la dernière page
+      let all = [];
+      let cursor = null;
+      do {
+        const response = await axios.get(`${API}/articles/public`, {
+          params: cursor ? { cursor, limit: 200 } : { limit: 200 }
+        });
+        all = all.concat(Array.isArray(response.data) ? response.data : []);
+        cursor = response.headers['x-next-cursor'];
+        setArticles(all);
+      } while (cursor);
     } catch (error) {
       console.error('Error fetching articles:', error);
       setArticles([]);
@@ -382,7 +391,7 @@ const CataloguePublic = () => {
                     <div className={`relative aspect-square bg-gradient-to-br ${theme.bg100} ${theme.bg200} overflow-hidden`}>
                       {item.data.image ? (
                         <LazyLoadImage
-                          src={item.data.image}
+                          src={photoSrc(item.data.image)}
                           alt={item.data.nom}
                           effect="blur"
                           className="w-full h-full object-cover"
@@ -425,7 +434,7 @@ const CataloguePublic = () => {
                   <div className="relative aspect-square bg-gradient-to-br from-gray-100 to-gray-200 overflow-hidden">
                     {article.photos && article.photos.length > 0 ? (
                       <LazyLoadImage
-                        src={article.photos[0]}
+                        src={photoSrc(article.photos[0], 'card')}
                         alt={article.nom}
                         effect="blur"
                         className="w-full h-full object-cover"
@@ -492,7 +501,7 @@ const CataloguePublic = () => {
                     {selectedArticle.photos.map((photo, idx) => (
                       <img
                         key={idx}
-                        src={photo}
+                        src={photoSrc(photo)}
                         alt={`${selectedArticle.nom} ${idx + 1}`}
                         className="w-full rounded-xl object-cover aspect-square"
                       />
@@ -711,7 +720,7 @@ const CataloguePublic = () => {
               <div className="space-y-4">
                 {selectedPub.image && (
                   <img
-                    src={selectedPub.image}
+                    src={photoSrc(selectedPub.image)}
                     alt={selectedPub.nom}
                     className="w-full rounded-xl object-cover max-h-96"
                   />
@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useContext } from 'react';
 import axios from 'axios';
+import { photoSrc, uploadPhoto } from '../lib/utils';
 import { AuthContext } from '../App';
 import Layout from '../components/Layout';
 import { useTheme } from '../hooks/useTheme';
@@ -186,14 +187,15 @@ const Dashboard = () => {
     }
   };
 
-  const handleImageUpload = (e) => {
+  const handleImageUpload = async (e) => {
     const file = e.target.files[0];
     if (file) {
-      const reader = new FileReader();
-      reader.onloadend = () => {
-        setNewPostit({ ...newPostit, photo: reader.result });
-      };
-      reader.readAsDataURL(file);
+      try {
+        const url = await uploadPhoto(file);
+        setNewPostit(prev => ({ ...prev, photo: url }));
+      } catch (error) {
+        toast.error('Erreur lors de l\'envoi de la photo');
+      }
     }
   };
 
@@ -292,7 +294,7 @@ const Dashboard = () => {
                   <p className="text-gray-700 text-sm mb-3">{currentPostit.message}</p>
                   {currentPostit.photo && (
                     <LazyLoadImage
-                      src={currentPostit.photo}
+                      src={photoSrc(currentPostit.photo)}
                       alt="Post-it"
                       effect="blur"
                       className="w-full h-32 object-cover rounded-lg mb-2"
@@ -1,5 +1,6 @@
 import React, { useContext, useEffect, useState } from 'react';
 import axios from 'axios';
+import { photoSrc } from '../lib/utils';
 import Layout from '../components/Layout';
 import { Button } from '../components/ui/button';
 import { useTheme } from '../hooks/useTheme';
@@ -99,7 +100,7 @@ const DealFire = () => {
               <div key={d.id} className="glass rounded-2xl overflow-hidden shadow-md">
                 <div className="relative aspect-square bg-gradient-to-br from-gray-100 to-gray-200 overflow-hidden">
                   {d.image ? (
-                    <img src={d.image} alt={d.nom} className="w-full h-full object-cover" loading="lazy" />
+                    <img src={photoSrc(d.image)} alt={d.nom} className="w-full h-full object-cover" loading="lazy" />
                   ) : (
                     <div className="w-full h-full flex items-center justify-center">
                       <span className="text-4xl font-bold text-gray-400">🔥</span>
@@ -152,7 +153,7 @@ const DealFire = () => {
               </DialogHeader>
               <div className="space-y-4">
                 {selected.image && (
-                  <img src={selected.image} alt={selected.nom} className="w-full rounded-xl object-cover max-h-96" />
+                  <img src={photoSrc(selected.image)} alt={selected.nom} className="w-full rounded-xl object-cover max-h-96" />
                 )}
                 {selected.description && <p className="text-gray-900">{selected.description}</p>}
                 <div className="flex items-center gap-4">
@@ -1,5 +1,6 @@
 import React, { useContext, useEffect, useState } from 'react';
 import axios from 'axios';
+import { photoSrc, uploadPhoto } from '../lib/utils';
 import Layout from '../components/Layout';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
@@ -32,11 +33,12 @@ const Deals = () => {
   const onFileChange = async (e) => {
     const file = e.target.files?.[0];
     if (!file) return;
-    const reader = new FileReader();
-    reader.onload = () => {
-      setForm((f) => ({ ...f, image: reader.result }));
-    };
-    reader.readAsDataURL(file);
+    try {
+      const url = await uploadPhoto(file);
+      setForm((f) => ({ ...f, image: url }));
+    } catch (error) {
+      toast.error('Erreur lors de l\'envoi de la photo');
+    }
   };
 
   const loadMyDeals = async () => {
@@ -129,7 +131,7 @@ const Deals = () => {
               <div key={d.id} className="glass rounded-2xl overflow-hidden shadow-md">
                 <div className="relative aspect-square bg-gradient-to-br from-gray-100 to-gray-200 overflow-hidden">
                   {d.image ? (
-                    <img src={d.image} alt={d.nom} className="w-full h-full object-cover" />
+                    <img src={photoSrc(d.image)} alt={d.nom} className="w-full h-full object-cover" />
                   ) : (
                     <div className="w-full h-full flex items-center justify-center">
                       <span className="text-4xl font-bold text-gray-400">🔥</span>
@@ -181,7 +183,7 @@ const Deals = () => {
             <div>
               <label className="block text-sm text-gray-700 mb-1">Photo</label>
               <Input type="file" accept="image/*" onChange={onFileChange} />
-              {form.image && <img src={form.image} alt="preview" className="mt-2 h-32 rounded-lg object-cover" />}
+              {form.image && <img src={photoSrc(form.image)} alt="preview" className="mt-2 h-32 rounded-lg object-cover" />}
             </div>
             <div>
               <label className="block text-sm text-gray-700 mb-1">Nom</label>
@@ -8,6 +8,7 @@ import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, Responsive
 import { Plus, Minus, Search, Droplet } from 'lucide-react';
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from '../components/ui/dialog';
 import { LazyLoadImage } from 'react-lazy-load-image-component';
+import { photoSrc } from '../lib/utils';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -80,7 +81,7 @@ const LiquideThumbnail = ({ liquideId, liquideNom }) => {
         </div>
       ) : photo ? (
         <LazyLoadImage
-          src={photo}
+          src={photoSrc(photo, 'card')}
           alt={liquideNom}
           effect="blur"
           className="w-full h-full object-cover"
@@ -13,6 +13,7 @@ import { Checkbox } from '../components/ui/checkbox';
 import { toast } from 'sonner';
 import { Plus, Search, Download, ExternalLink, Trash2, Edit, ChevronLeft, ChevronRight } from 'lucide-react';
 import { LazyLoadImage } from 'react-lazy-load-image-component';
+import { photoSrc, uploadPhoto } from '../lib/utils';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -83,7 +84,7 @@ const ArticleThumbnail = ({ articleId, articleNom }) => {
         <div className="w-full h-full bg-gray-200 animate-pulse" />
       ) : photo ? (
         <LazyLoadImage
-          src={photo}
+          src={photoSrc(photo, 'card')}
           alt={articleNom}
           effect="blur"
           className="w-full h-full object-cover"
@@ -258,16 +259,16 @@ const Inventaire = () => {
     }
   };
 
-  const handleImageUpload = (e) => {
+  const handleImageUpload = async (e) => {
     const files = Array.from(e.target.files);
     setPhotosModified(true); // Mark photos as modified
-    files.forEach(file => {
-      const reader = new FileReader();
-      reader.onloadend = () => {
-        setPhotos(prev => [...prev, reader.result]);
-      };
-      reader.readAsDataURL(file);
-    });
+    // Each file goes to the photo store, the article only keeps the returned references
+    const results = await Promise.allSettled(files.map(uploadPhoto));
+    const uploaded = results.filter(result => result.status === 'fulfilled').map(result => result.value);
+    setPhotos(prev => [...prev, ...uploaded]);
+    if (uploaded.length < files.length) {
+      toast.error('Erreur lors de l\'envoi des photos');
+    }
   };
 
   const handleSubmit = async (e) => {
@@ -558,7 +559,7 @@ const Inventaire = () => {
                       <div className="grid grid-cols-4 gap-2 mt-2">
                         {photos.map((photo, idx) => (
                           <div key={idx} className="relative">
-                            <img src={photo} alt="Preview" className="w-full h-20 object-cover rounded" />
+                            <img src={photoSrc(photo)} alt="Preview" className="w-full h-20 object-cover rounded" />
                             <button
                               type="button"
                               onClick={() => {
@@ -1338,7 +1339,7 @@ const Inventaire = () => {
                     {selectedArticleView.photos.map((photo, idx) => (
                       <img
                         key={idx}
-                        src={photo}
+                        src={photoSrc(photo)}
                         alt={`${selectedArticleView.nom} ${idx + 1}`}
                         className="w-full rounded-xl object-cover aspect-square"
                       />
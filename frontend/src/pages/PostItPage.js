@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useContext } from 'react';
 import axios from 'axios';
+import { photoSrc, uploadPhoto } from '../lib/utils';
 import { AuthContext } from '../App';
 import Layout from '../components/Layout';
 import { Button } from '../components/ui/button';
@@ -80,14 +81,15 @@ const PostItPage = () => {
     }
   };
 
-  const handleImageUpload = (e) => {
+  const handleImageUpload = async (e) => {
     const file = e.target.files[0];
     if (file) {
-      const reader = new FileReader();
-      reader.onloadend = () => {
-        setFormData({ ...formData, photo: reader.result });
-      };
-      reader.readAsDataURL(file);
+      try {
+        const url = await uploadPhoto(file);
+        setFormData(prev => ({ ...prev, photo: url }));
+      } catch (error) {
+        toast.error('Erreur lors de l\'envoi de la photo');
+      }
     }
   };
 
@@ -142,7 +144,7 @@ const PostItPage = () => {
                   data-testid="postit-photo-input"
                 />
                 {formData.photo && (
-                  <img src={formData.photo} alt="Preview" className="mt-2 w-full max-h-48 object-cover rounded-lg" />
+                  <img src={photoSrc(formData.photo)} alt="Preview" className="mt-2 w-full max-h-48 object-cover rounded-lg" />
                 )}
               </div>
               <div className="flex space-x-3 pt-4">
@@ -171,7 +173,7 @@ const PostItPage = () => {
               
               {currentPostit.photo && (
                 <LazyLoadImage
-                  src={currentPostit.photo}
+                  src={photoSrc(currentPostit.photo)}
                   alt="Post-it"
                   effect="blur"
                   className="w-full max-h-64 object-cover rounded-xl mb-6 shadow-md"
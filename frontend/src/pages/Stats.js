@@ -4,6 +4,7 @@ import Layout from '../components/Layout';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 import { Eye, TrendingUp } from 'lucide-react';
 import { LazyLoadImage } from 'react-lazy-load-image-component';
+import { photoSrc } from '../lib/utils';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -72,7 +73,7 @@ const Stats = () => {
                     <div className="w-16 h-16 bg-gradient-to-br from-gray-100 to-gray-200 rounded-lg overflow-hidden">
                       {stat.photo ? (
                         <LazyLoadImage
-                          src={stat.photo}
+                          src={photoSrc(stat.photo)}
                           alt={stat.nom}
                           effect="blur"
                           className="w-full h-full object-cover"
@@ -8,6 +8,7 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '.
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from '../../components/ui/dialog';
 import { Label } from '../../components/ui/label';
 import { toast } from 'sonner';
+import { photoSrc, uploadPhoto } from '../../lib/utils';
 import { Plus, Trash2, MessageSquare } from 'lucide-react';
 import { LazyLoadImage } from 'react-lazy-load-image-component';
 
@@ -38,14 +39,15 @@ const AdminPubs = () => {
     }
   };
 
-  const handleImageUpload = (e) => {
+  const handleImageUpload = async (e) => {
     const file = e.target.files[0];
     if (file) {
-      const reader = new FileReader();
-      reader.onloadend = () => {
-        setFormData({ ...formData, image: reader.result });
-      };
-      reader.readAsDataURL(file);
+      try {
+        const url = await uploadPhoto(file);
+        setFormData(prev => ({ ...prev, image: url }));
+      } catch (error) {
+        toast.error('Erreur lors de l\'envoi de la photo');
+      }
     }
   };
 
@@ -144,7 +146,7 @@ const AdminPubs = () => {
                     data-testid="pub-image-input"
                   />
                   {formData.image && (
-                    <img src={formData.image} alt="Preview" className="mt-2 w-full max-h-48 object-cover rounded-lg" />
+                    <img src={photoSrc(formData.image)} alt="Preview" className="mt-2 w-full max-h-48 object-cover rounded-lg" />
                   )}
                 </div>
                 <div>
@@ -180,7 +182,7 @@ const AdminPubs = () => {
                 <div key={pub.id} className="bg-white rounded-xl p-4 shadow-sm" data-testid={`pub-${pub.id}`}>
                   {pub.image && (
                     <LazyLoadImage
-                      src={pub.image}
+                      src={photoSrc(pub.image)}
                       alt={pub.nom}
                       effect="blur"
                       className="w-full h-40 object-cover rounded-lg mb-3"
@@ -218,7 +220,7 @@ const AdminPubs = () => {
                 <div key={offre.id} className="bg-white rounded-xl p-4 shadow-sm" data-testid={`offre-${offre.id}`}>
                   {offre.image && (
                     <LazyLoadImage
-                      src={offre.image}
+                      src={photoSrc(offre.image)}
                       alt={offre.nom}
                       effect="blur"
                       className="w-full h-40 object-cover rounded-lg mb-3"
@@ -0,0 +1,48 @@
+"""
+API test fixtures: the FastAPI app against an in-memory Mongo (mongomock-motor)
+"""
+import base64
+import io
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+from PIL import Image
+
+import server
+
+@pytest.fixture
+def client(monkeypatch):
+    """Admin client on an empty database, with the in-process caches reset"""
+    monkeypatch.setattr(server, 'db', AsyncMongoMockClient()['bms_test'])
+    monkeypatch.setattr(server, 'image_pool', None)  # shut down by the app shutdown event
+    monkeypatch.setattr(server, 'collection_versions', server.Counter())
+    monkeypatch.setattr(server, 'response_cache', server.ResponseCache(server.RESPONSE_CACHE_MAX_BYTES, server.RESPONSE_CACHE_TTL))
+    monkeypatch.setattr(server, 'article_ids', server.IdBlockAllocator('articles', server.ARTICLE_ID_BLOCK))
+    server.count_cache.clear()
+    server.facets_cache.clear()
+    server.search_cache.clear()
+    
+    with TestClient(server.app) as test_client:
+        test_client.headers['Authorization'] = f"Bearer {server.create_token('AdminLudo', 'admin')}"
+        yield test_client
+
+@pytest.fixture
+def db(client):
+    return server.db
+
+def jpeg_bytes(color, size=(1000, 800)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+def jpeg_data_url(color, size=(1000, 800)) -> str:
+    return 'data:image/jpeg;base64,' + base64.b64encode(jpeg_bytes(color, size)).decode()
@@ -0,0 +1,16 @@
+"""
+Article details (GET /articles/{id}, GET /articles/public/{id})
+"""
+import server
+
+def test_details_leave_the_materialized_fields_out(client):
+    response = client.post('/api/articles', json={
+        'type': 'piece', 'nom': 'Alternateur', 'ref': 'E11 574012068', 'sous_categorie': 'Alternateur', 'public': True
+    })
+    assert response.status_code == 200, response.text
+    article_id = response.json()['id']
+    
+    for path in (f'/api/articles/{article_id}', f'/api/articles/public/{article_id}'):
+        article = client.get(path).json()
+        assert article['ref'] == 'E11 574012068'
+        assert not set(server.ARTICLE_INTERNAL_FIELDS) & set(article), path
@@ -0,0 +1,42 @@
+"""
+Filter sidebar facets (GET /articles/facets) against the articles list filters
+"""
+
+def create_article(client, ref, **fields):
+    response = client.post('/api/articles', json={'type': 'piece', 'nom': f'Article {ref}', 'ref': ref, **fields})
+    assert response.status_code == 200, response.text
+    return response.json()['id']
+
+def test_sous_categorie_facet_counts_each_sub_category(client):
+    create_article(client, 'A1', categorie='Moteur', sous_categorie='Alternateur, Démarreur')
+    create_article(client, 'A2', categorie='Moteur', sous_categorie='Alternateur')
+    create_article(client, 'A3', categorie='Moteur', sous_categorie=' demarreur ')
+    create_article(client, 'A4', categorie='Moteur', sous_categorie='Démarreur')
+    create_article(client, 'A5', categorie='Moteur')
+    
+    facets = client.get('/api/articles/facets').json()
+    assert facets['sous_categorie'] == [{'value': 'Démarreur', 'count': 3}, {'value': 'Alternateur', 'count': 2}]
+
+def test_facet_values_round_trip_through_the_filter(client):
+    create_article(client, 'A1', categorie='Moteur', sous_categorie='Alternateur, Démarreur')
+    create_article(client, 'A2', categorie='Freinage', sous_categorie='Disques')
+    create_article(client, 'A3', categorie='Freinage', sous_categorie='Disques, Plaquettes')
+    
+    categories = client.get('/api/categories').json()
+    facets = client.get('/api/articles/facets').json()
+    assert sorted(bucket['value'] for bucket in facets['sous_categorie']) == categories['sous_categories']
+    for bucket in facets['sous_categorie']:
+        listed = client.get('/api/articles', params={'sous_category': bucket['value']}).json()
+        assert listed['total'] == bucket['count']
+
+def test_brand_filter_and_facet_ignore_the_spelling(client):
+    for ref, marque in (('F1', 'Mann Filter'), ('F2', 'MANN  FILTER'), ('F3', ' mann filter'), ('F4', 'Bosch')):
+        create_article(client, ref, marque=marque, public=True, quantite=2)
+    
+    facets = client.get('/api/articles/facets').json()
+    assert facets['marque'] == [{'value': 'Mann Filter', 'count': 3}, {'value': 'Bosch', 'count': 1}]
+    
+    marques = client.get('/api/marques-public').json()
+    assert 'Mann Filter' in marques
+    listed = client.get('/api/articles/public', params={'marque': 'Mann Filter'}).json()
+    assert len(listed) == 3
@@ -0,0 +1,60 @@
+"""
+Bulk article import (POST /articles/import)
+"""
+import json
+
+from .conftest import jpeg_bytes
+
+def upload_photo(client, color) -> dict:
+    response = client.post('/api/photos', files={'file': ('photo.jpg', jpeg_bytes(color), 'image/jpeg')})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def import_ndjson(client, rows) -> dict:
+    body = '\n'.join(json.dumps(row) for row in rows).encode()
+    response = client.post('/api/articles/import', files={'file': ('articles.ndjson', body, 'application/x-ndjson')})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def photo_refs(client, db) -> dict:
+    photos = client.portal.call(lambda: db.photos.find({}, {'_id': 0, 'id': 1, 'refs': 1}).to_list(None))
+    return {photo['id']: photo['refs'] for photo in photos}
+
+def test_articles_sharing_a_photo_each_hold_a_reference(client, db):
+    photo = upload_photo(client, (200, 30, 30))
+    result = import_ndjson(client, [
+        {'type': 'piece', 'nom': 'Alternateur', 'ref': 'A1', 'photos': [photo['url']]},
+        {'type': 'piece', 'nom': 'Démarreur', 'ref': 'A2', 'photos': [photo['url'], photo['url']]},
+        {'type': 'piece', 'nom': 'Courroie', 'ref': 'A3', 'photos': [photo['url']]},
+    ])
+    assert result['imported'] == 3
+    assert photo_refs(client, db) == {photo['id']: 3}
+    
+    # Deleting one of them keeps the photo of the others
+    listed = client.get('/api/articles').json()['articles']
+    assert client.delete(f"/api/articles/{listed[0]['id']}").status_code == 200
+    assert photo_refs(client, db) == {photo['id']: 2}
+
+def test_rows_with_unknown_photos_are_rejected(client, db):
+    photo = upload_photo(client, (30, 200, 30))
+    missing = '/api/photos/' + '0' * 64
+    result = import_ndjson(client, [
+        {'type': 'piece', 'nom': 'Alternateur', 'ref': 'A1', 'photos': [photo['url']]},
+        {'type': 'piece', 'nom': 'Démarreur', 'ref': 'A2', 'photos': [photo['url'], missing]},
+    ])
+    assert result['imported'] == 1
+    assert result['error_rows'] == 1
+    assert result['errors'][0]['row'] == 2
+    assert missing in result['errors'][0]['errors'][0]
+    assert photo_refs(client, db) == {photo['id']: 1}
+
+def test_ndjson_rows_that_are_not_objects(client):
+    body = b'{"type": "piece", "nom": "Alternateur", "ref": "A1"}\n"hello"\n[1, 2]\n{"nom": \n'
+    response = client.post('/api/articles/import', files={'file': ('articles.ndjson', body, 'application/x-ndjson')})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result['imported'] == 1
+    errors = {error['row']: error['errors'] for error in result['errors']}
+    assert errors[2] == ['A JSON object is expected']
+    assert errors[3] == ['A JSON object is expected']
+    assert errors[4][0].startswith('Invalid JSON')
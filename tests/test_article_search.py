@@ -0,0 +1,67 @@
+"""
+Search dispatch of the articles list (build_search_query)
+"""
+import pytest
+
+import server
+
+@pytest.fixture
+def probes(db, monkeypatch):
+    """find_one queries sent to the articles collection"""
+    sent = []
+    collection_type = type(db.articles)
+    find_one = collection_type.find_one
+    
+    async def recording_find_one(self, *args, **kwargs):
+        if self.name == 'articles':
+            sent.append(args[0] if args else kwargs.get('filter'))
+        return await find_one(self, *args, **kwargs)
+    
+    monkeypatch.setattr(collection_type, 'find_one', recording_find_one)
+    return sent
+
+def create_article(client, ref, **fields):
+    response = client.post('/api/articles', json={'type': 'piece', 'nom': f'Article {ref}', 'ref': ref, **fields})
+    assert response.status_code == 200, response.text
+    return response.json()['id']
+
+def test_reference_search_is_probed_once(client, probes):
+    article_id = create_article(client, 'E11 574012068')
+    probes.clear()
+    
+    for _ in range(3):
+        response = client.get('/api/articles', params={'search': 'E11574'})
+        assert [article['id'] for article in response.json()['articles']] == [article_id]
+        client.get('/api/articles/facets', params={'search': 'E11574'})
+    assert len(probes) == 1
+    
+    # Another filter is another decision
+    client.get('/api/articles', params={'search': 'E11574', 'etat': 'neuf'})
+    assert len(probes) > 1
+
+def test_search_decision_expires_on_article_write(client, probes):
+    create_article(client, 'E11 574012068')
+    client.get('/api/articles', params={'search': 'E11574'})
+    probes.clear()
+    
+    second = create_article(client, 'E11 574099999')
+    probes.clear()
+    response = client.get('/api/articles', params={'search': 'E115740999'})
+    assert [article['id'] for article in response.json()['articles']] == [second]
+    assert len(probes) == 1
+
+def test_digit_searches_out_of_the_id_range(client, monkeypatch):
+    article_id = create_article(client, '12345678901234567890123')
+    
+    # Unicode digits are not ASCII digits: text search instead of an int() error
+    async def text_search(search, query):
+        return {'text': search}, True
+    with monkeypatch.context() as patch:
+        patch.setattr(server, 'build_text_search_query', text_search)
+        assert client.portal.call(server.build_search_query, '²', {}) == ({'text': '²'}, True)
+    
+    # Too long for an int64 id: reference prefix only
+    query, _ = client.portal.call(server.build_search_query, '12345678901234567890', {})
+    assert query == {'$or': [{'ref_key': {'$regex': '^12345678901234567890'}}]}
+    response = client.get('/api/articles', params={'search': '12345678901234567890'})
+    assert [article['id'] for article in response.json()['articles']] == [article_id]
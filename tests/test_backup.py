@@ -0,0 +1,18 @@
+"""
+Full JSON backup (GET /backup)
+"""
+import base64
+
+import server
+
+from .conftest import jpeg_data_url
+
+def test_backup_photos_are_plain_json(client, db):
+    response = client.post('/api/articles', json={'type': 'piece', 'nom': 'Alternateur', 'ref': 'A1', 'photos': [jpeg_data_url((200, 30, 30))]})
+    assert response.status_code == 200, response.text
+    stored = client.portal.call(db.photos.find_one, {}, {'_id': 0})
+    
+    backup = client.get('/api/backup').json()
+    [photo] = backup['photos']
+    assert base64.b64decode(photo['data']) == stored['data']
+    assert not any(size in photo for size in server.PHOTO_SIZES if size != 'full')
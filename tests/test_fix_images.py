@@ -0,0 +1,83 @@
+"""
+Background fix images job (POST /articles/fix-images)
+"""
+import asyncio
+import time
+
+import pytest
+
+import server
+
+from .conftest import jpeg_data_url
+
+@pytest.fixture
+def round_trips(db, monkeypatch):
+    """Mongo calls that take time to answer, like a real server (mongomock answers at once)"""
+    collection_type = type(db.jobs)
+    for name in ('find_one', 'count_documents', 'replace_one'):
+        method = getattr(collection_type, name)
+        
+        async def slow(self, *args, _method=method, **kwargs):
+            await asyncio.sleep(0.01)
+            return await _method(self, *args, **kwargs)
+        monkeypatch.setattr(collection_type, name, slow)
+
+def insert_inline_articles(client, db, count):
+    """Articles written before the photo store: photos inline as data URLs"""
+    articles = [
+        {'id': article_id, 'type': 'piece', 'nom': f'Article {article_id}', 'photos': [jpeg_data_url((article_id * 20, 30, 30))]}
+        for article_id in range(1, count + 1)
+    ]
+    client.portal.call(db.articles.insert_many, articles)
+
+def wait_for_job(client, status='done', timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get('/api/articles/fix-images/status').json()
+        if job['status'] == status:
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f'fix-images job still {job["status"]}')
+
+def test_start_reports_the_new_job(client, db, round_trips):
+    insert_inline_articles(client, db, 3)
+    
+    response = client.post('/api/articles/fix-images')
+    assert response.status_code == 202
+    job = response.json()
+    assert job['status'] in ('running', 'done')
+    assert job['total'] == 3
+    
+    job = wait_for_job(client)
+    assert job['processed'] == 3 and job['remaining'] == 0
+    articles = client.portal.call(lambda: db.articles.find({}, {'_id': 0, 'photos': 1}).to_list(None))
+    assert all(article['photos'][0].startswith(server.PHOTO_URL_PREFIX) for article in articles)
+
+def test_failed_job_resumes_after_its_checkpoint(client, db, monkeypatch):
+    insert_inline_articles(client, db, 5)
+    monkeypatch.setattr(server, 'FIX_IMAGES_BATCH', 2)
+    
+    fix_images_batch = server.fix_images_batch
+    batches = []
+    
+    async def recording_batch(articles):
+        batches.append([article['id'] for article in articles])
+        return await fix_images_batch(articles)
+    
+    async def crash_on_second_batch(articles):
+        if batches:
+            raise RuntimeError('server stopped')
+        return await recording_batch(articles)
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(server, 'fix_images_batch', crash_on_second_batch)
+        client.post('/api/articles/fix-images')
+        job = wait_for_job(client, status='failed')
+    assert job['last_id'] == 2 and job['processed'] == 2
+    
+    # Started again: only the articles after the checkpoint are processed
+    monkeypatch.setattr(server, 'fix_images_batch', recording_batch)
+    client.post('/api/articles/fix-images')
+    job = wait_for_job(client)
+    assert batches == [[1, 2], [3, 4], [5]]
+    assert job['processed'] == 5 and job['total'] == 5 and job['remaining'] == 0
@@ -0,0 +1,145 @@
+"""
+Reference counting of the photo store (photos.refs) through the article endpoints
+"""
+import server
+
+from .conftest import jpeg_bytes, jpeg_data_url
+
+RED = jpeg_data_url((200, 30, 30))
+GREEN = jpeg_data_url((30, 200, 30))
+BLUE = jpeg_data_url((30, 30, 200))
+
+def photo_refs(client, db) -> dict:
+    photos = client.portal.call(lambda: db.photos.find({}, {'_id': 0, 'id': 1, 'refs': 1}).to_list(None))
+    return {photo['id']: photo['refs'] for photo in photos}
+
+def age_photos(client, db):
+    """Move every photo past the unreferenced grace period"""
+    created_at = (server.datetime.now(server.timezone.utc) - server.UNREFERENCED_PHOTO_GRACE * 2).isoformat()
+    client.portal.call(db.photos.update_many, {}, {'$set': {'created_at': created_at}})
+
+def article_photos(client, db, article_id) -> list:
+    article = client.portal.call(db.articles.find_one, {'id': article_id})
+    return article['photos']
+
+def create_article(client, ref, photos) -> int:
+    response = client.post('/api/articles', json={'type': 'piece', 'nom': f'Article {ref}', 'ref': ref, 'photos': photos})
+    assert response.status_code == 200, response.text
+    return response.json()['id']
+
+def test_create_counts_each_article_once(client, db):
+    # The same photo twice in one request is still a single reference
+    article_id = create_article(client, 'A1', [RED, RED, GREEN])
+    
+    photos = article_photos(client, db, article_id)
+    assert all(photo.startswith(server.PHOTO_URL_PREFIX) for photo in photos)
+    assert photos[0] == photos[1]
+    assert photo_refs(client, db) == {server.photo_id_from_ref(photos[0]): 1, server.photo_id_from_ref(photos[2]): 1}
+
+def test_known_upload_is_shared(client, db):
+    first = create_article(client, 'A1', [RED])
+    second = create_article(client, 'A2', [RED])
+    
+    assert article_photos(client, db, first) == article_photos(client, db, second)
+    assert list(photo_refs(client, db).values()) == [2]
+
+def test_update_keeps_adds_and_removes(client, db):
+    article_id = create_article(client, 'A1', [RED, GREEN])
+    red, green = article_photos(client, db, article_id)
+    age_photos(client, db)
+    
+    response = client.put(f'/api/articles/{article_id}', json={'type': 'piece', 'nom': 'Article A1', 'ref': 'A1', 'photos': [red, BLUE]})
+    assert response.status_code == 200, response.text
+    
+    kept, blue = article_photos(client, db, article_id)
+    assert kept == red
+    refs = photo_refs(client, db)
+    assert refs == {server.photo_id_from_ref(red): 1, server.photo_id_from_ref(blue): 1}
+    assert server.photo_id_from_ref(green) not in refs
+
+def test_update_without_photo_changes(client, db):
+    article_id = create_article(client, 'A1', [RED])
+    photos = article_photos(client, db, article_id)
+    
+    response = client.put(f'/api/articles/{article_id}', json={'type': 'piece', 'nom': 'Renamed', 'ref': 'A1', 'photos': photos})
+    assert response.status_code == 200, response.text
+    assert list(photo_refs(client, db).values()) == [1]
+
+def test_delete_releases_photos(client, db):
+    first = create_article(client, 'A1', [RED])
+    second = create_article(client, 'A2', [RED, GREEN])
+    age_photos(client, db)
+    
+    assert client.delete(f'/api/articles/{first}').status_code == 200
+    assert sorted(photo_refs(client, db).values()) == [1, 1]
+    
+    assert client.delete(f'/api/articles/{second}').status_code == 200
+    assert photo_refs(client, db) == {}
+
+def test_uploaded_photo_is_acquired_by_the_article(client, db):
+    response = client.post('/api/photos', files={'file': ('red.jpg', jpeg_bytes((200, 30, 30)), 'image/jpeg')})
+    assert response.status_code == 200, response.text
+    upload = response.json()
+    assert photo_refs(client, db) == {upload['id']: 0}
+    
+    create_article(client, 'A1', [upload['url']])
+    create_article(client, 'A2', [upload['url']])
+    assert photo_refs(client, db) == {upload['id']: 2}
+
+def test_known_photo_deleted_before_it_is_acquired(client, db, monkeypatch):
+    # Another request releases the photo between the sources lookup and the $inc
+    article_id = create_article(client, 'A1', [RED])
+    photo_id = server.photo_id_from_ref(article_photos(client, db, article_id)[0])
+    
+    collection_type = type(db.photos)
+    update_one = collection_type.update_one
+    
+    async def update_one_after_delete(self, filter, update, *args, **kwargs):
+        if self.name == 'photos' and set(update) == {'$inc'}:
+            await self.delete_many(filter)
+        return await update_one(self, filter, update, *args, **kwargs)
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(collection_type, 'update_one', update_one_after_delete)
+        second = create_article(client, 'A2', [RED])
+    
+    assert article_photos(client, db, second) == [server.photo_ref(photo_id)]
+    assert photo_refs(client, db) == {photo_id: 1}
+
+def test_recent_photo_survives_its_release(client, db):
+    article_id = create_article(client, 'A1', [RED])
+    photo_id = server.photo_id_from_ref(article_photos(client, db, article_id)[0])
+    
+    assert client.delete(f'/api/articles/{article_id}').status_code == 200
+    assert photo_refs(client, db) == {photo_id: 0}
+    
+    # Deleted by the next rebuild once the grace period is over
+    age_photos(client, db)
+    assert client.portal.call(server.rebuild_photo_refs)['photos_deleted'] == 1
+
+def test_known_upload_released_while_the_form_is_open(client, db):
+    article_id = create_article(client, 'A1', [RED])
+    age_photos(client, db)
+    
+    # The upload hands out the stored photo, then its last article is deleted
+    upload = client.post('/api/photos', files={'file': ('red.jpg', jpeg_bytes((200, 30, 30)), 'image/jpeg')}).json()
+    assert client.delete(f'/api/articles/{article_id}').status_code == 200
+    
+    create_article(client, 'A2', [upload['url']])
+    assert photo_refs(client, db) == {upload['id']: 1}
+    assert client.get(upload['url']).status_code == 200
+
+def test_unknown_photo_reference_is_rejected(client, db):
+    unknown = server.photo_ref('0' * 64)
+    response = client.post('/api/articles', json={'type': 'piece', 'nom': 'A1', 'ref': 'A1', 'photos': [unknown]})
+    assert response.status_code == 400
+    assert unknown in response.json()['detail']
+    
+    article_id = create_article(client, 'A1', [RED])
+    photos = article_photos(client, db, article_id)
+    response = client.put(f'/api/articles/{article_id}', json={'type': 'piece', 'nom': 'A1', 'ref': 'A1', 'photos': [*photos, unknown]})
+    assert response.status_code == 400
+    assert article_photos(client, db, article_id) == photos
+    
+    response = client.post('/api/postits', json={'objet': 'Photo', 'message': 'Voir photo', 'photo': unknown})
+    assert response.status_code == 400
@@ -0,0 +1,68 @@
+"""
+Response cache of the public endpoints: ETags, 304, invalidation and shared builds
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import server
+
+def create_article(client, ref, **fields):
+    response = client.post('/api/articles', json={'type': 'piece', 'nom': f'Article {ref}', 'ref': ref, **fields})
+    assert response.status_code == 200, response.text
+    return response.json()['id']
+
+def test_if_none_match_answers_304(client):
+    create_article(client, 'A1', categorie='Freinage')
+    
+    response = client.get('/api/categories')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    
+    cached = client.get('/api/categories', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+    assert not cached.content
+    # Weak form added by compressing proxies
+    assert client.get('/api/categories', headers={'If-None-Match': f'W/{etag}'}).status_code == 304
+
+def test_write_invalidates_the_cached_response(client):
+    create_article(client, 'A1', categorie='Freinage')
+    etag = client.get('/api/categories').headers['ETag']
+    
+    create_article(client, 'A2', categorie='Moteur')
+    response = client.get('/api/categories', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.json()['categories'] == ['Freinage', 'Moteur']
+
+def test_article_write_only_invalidates_that_article(client):
+    first = create_article(client, 'A1', public=True)
+    second = create_article(client, 'A2', public=True)
+    first_etag = client.get(f'/api/articles/public/{first}').headers['ETag']
+    second_etag = client.get(f'/api/articles/public/{second}').headers['ETag']
+    
+    response = client.put(f'/api/articles/{first}', json={'type': 'piece', 'nom': 'Renamed', 'ref': 'A1', 'public': True})
+    assert response.status_code == 200, response.text
+    
+    response = client.get(f'/api/articles/public/{first}', headers={'If-None-Match': first_etag})
+    assert response.status_code == 200
+    assert response.json()['nom'] == 'Renamed'
+    assert client.get(f'/api/articles/public/{second}', headers={'If-None-Match': second_etag}).status_code == 304
+
+def test_concurrent_misses_share_one_build(client, monkeypatch):
+    load_categories = server.load_categories
+    builds = []
+    
+    async def slow_load_categories():
+        builds.append(1)
+        await asyncio.sleep(0.2)
+        return await load_categories()
+    
+    monkeypatch.setattr(server, 'load_categories', slow_load_categories)
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        responses = list(pool.map(lambda _: client.get('/api/categories'), range(5)))
+    
+    assert [response.status_code for response in responses] == [200] * 5
+    assert len({response.headers['ETag'] for response in responses}) == 1
+    assert len(builds) == 1
+    assert server.response_cache.stats()['coalesced'] == 4
@@ -0,0 +1,30 @@
+"""
+Article ids and order numbers allocated from the counters collection
+"""
+from datetime import datetime, timezone
+
+def test_article_id_taken_outside_the_counter_is_skipped(client, db):
+    # Written without the counter (restored backup, older seed script)
+    client.portal.call(db.articles.insert_one, {'id': 1, 'type': 'piece', 'nom': 'Restored', 'sku': 'BMS-RESTORED'})
+    
+    response = client.post('/api/articles', json={'type': 'piece', 'nom': 'Alternateur', 'ref': 'A1'})
+    assert response.status_code == 200, response.text
+    first = response.json()['id']
+    assert first > 1
+    
+    # The next ids come from the block reserved past the taken one
+    response = client.post('/api/articles', json={'type': 'piece', 'nom': 'Démarreur', 'ref': 'A2'})
+    assert response.json()['id'] == first + 1
+    assert client.portal.call(db.articles.count_documents, {}) == 3
+
+def test_order_number_taken_outside_the_counter_is_skipped(client, db):
+    year = datetime.now(timezone.utc).year
+    client.portal.call(db.commandes.insert_one, {'id': 'restored', 'numero': f'CMD-{year}-0001', 'items': [], 'total': 0})
+    
+    commande = {'items': [{'article_id': 1, 'nom': 'Alternateur', 'prix_vente': 120.0, 'quantite': 1}], 'total': 120.0}
+    numeros = []
+    for _ in range(2):
+        response = client.post('/api/commandes', json=commande)
+        assert response.status_code == 200, response.text
+        numeros.append(response.json()['numero'])
+    assert numeros == [f'CMD-{year}-0002', f'CMD-{year}-0003']